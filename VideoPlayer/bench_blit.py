@@ -0,0 +1,43 @@
+"""
+blit benchmark -> rgb24 frames vs frames in the negotiated display layout
+usage: python bench_blit.py [width] [height] [blits]
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")  # headless
+
+import pygame
+import framecache
+
+
+def measure(screen, pix_fmt, resolution, blits):
+    """
+    blit one wrapped frame buffer repeatedly
+    :return: float seconds per blit
+    """
+    bytes_per_pixel, buffer_format = framecache.PIXEL_FORMATS[pix_fmt]
+    frame_buffer = bytearray(os.urandom(resolution[0] * resolution[1] * bytes_per_pixel))
+    surface = framecache.frame_surface(frame_buffer, resolution, buffer_format)
+
+    started = time.perf_counter()
+    for _ in range(blits):
+        screen.blit(surface, (0, 0))
+    return (time.perf_counter() - started) / blits
+
+
+if __name__ == "__main__":
+    resolution = (int(sys.argv[1]), int(sys.argv[2])) if len(sys.argv) > 2 else (1920, 1080)
+    blits = int(sys.argv[3]) if len(sys.argv) > 3 else 500
+
+    pygame.init()
+    screen = pygame.display.set_mode(resolution, 0, 32)
+    native = framecache.native_pix_fmt(screen)
+    print("display masks %s -> %s" % (tuple(hex(mask) for mask in screen.get_masks()), native))
+
+    baseline = measure(screen, "rgb24", resolution, blits)
+    print("%-6s %7.3f ms per blit" % ("rgb24", baseline * 1000))
+    for pix_fmt in sorted(set(["rgb0", native]) - set(["rgb24"])):
+        elapsed = measure(screen, pix_fmt, resolution, blits)
+        print("%-6s %7.3f ms per blit  %.2fx" % (pix_fmt, elapsed * 1000, baseline / elapsed))
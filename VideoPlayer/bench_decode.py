@@ -0,0 +1,65 @@
+"""
+decode throughput benchmark -> frames per second vs ffmpeg threads and segment processes
+usage: python bench_decode.py [filename] [path] [frames]
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")  # headless
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+import decodeconfig
+from videoplayer import VideoPlayer
+
+
+def measure(filename, path, frames, threads, processes):
+    """
+    pull frames from the decoder as fast as it produces them
+    :return: float frames per second
+    """
+    player = VideoPlayer(filename, path, hasSound=False, bindGUI=False,
+                         decodeThreads=threads, decodeProcesses=processes)
+    frames = min(frames, player.video_data["DURATION"])
+
+    started = time.perf_counter()
+    index = 0
+    while index < frames:
+        if player._decoder.get_frame(index) is not None:
+            index += 1
+        elif player._decoder.finished:
+            break
+        else:
+            time.sleep(0.0005)
+    elapsed = time.perf_counter() - started
+
+    player.close()
+    return index / elapsed
+
+
+if __name__ == "__main__":
+    filename = sys.argv[1] if len(sys.argv) > 1 else "fbms.mp4"
+    path = sys.argv[2] if len(sys.argv) > 2 else "../rsc_testing"
+    frames = int(sys.argv[3]) if len(sys.argv) > 3 else 600
+
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+
+    cores = decodeconfig.cpu_count()
+    print("cores %d" % cores)
+
+    threads = 1
+    while threads <= cores:
+        print("threads %2d  processes 1  %7.1f fps" % (threads, measure(filename, path, frames, threads, 1)))
+        threads *= 2
+
+    processes = 2
+    while processes <= min(cores, 4):
+        threads = decodeconfig.decode_threads(players=1, processes=processes, cores=cores)
+        print("threads %2d  processes %d  %7.1f fps" % (
+            threads, processes, measure(filename, path, frames, threads, processes)
+        ))
+        processes *= 2
+
+    print("adaptive    %7.1f fps" % measure(filename, path, frames, None, None))
@@ -0,0 +1,41 @@
+"""
+pause/resume stress benchmark -> the frame pipe must survive every cycle
+usage: python bench_pause.py [filename] [path] [cycles]
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")  # headless
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+from videoplayer import VideoPlayer
+
+if __name__ == "__main__":
+    filename = sys.argv[1] if len(sys.argv) > 1 else "fbms.mp4"
+    path = sys.argv[2] if len(sys.argv) > 2 else "../rsc_testing"
+    cycles = int(sys.argv[3]) if len(sys.argv) > 3 else 1000
+
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+
+    video = VideoPlayer(filename, path, hasSound=False)
+    video.play()
+    pid = video._pipe.pid  # ffmpeg process at start
+
+    started = time.perf_counter()
+    for _ in range(cycles):
+        video.pause()
+        video.update()
+        video.unpause()
+        video.update()
+    elapsed = time.perf_counter() - started
+
+    stats = video.decoder_stats
+    print("cycles           %d" % cycles)
+    print("total            %.1f ms" % (elapsed * 1000))
+    print("per cycle        %.3f ms" % (elapsed * 1000 / cycles))
+    print("process restarts %d" % stats["PROCESS_RESTARTS"])
+    print("same ffmpeg pid  %s" % (video._pipe.pid == pid))
+    print("queue depth      %d" % stats["QUEUE_DEPTH"])
@@ -0,0 +1,59 @@
+"""
+seek latency benchmark -> keyframe index seek vs plain ffmpeg -ss seek
+usage: python bench_seek.py [filename] [path] [seeks]
+"""
+import os
+import random
+import statistics
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")  # headless
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+from videoplayer import VideoPlayer
+
+TIMEOUT = 10  # seconds to wait for a seek before giving up
+
+
+def measure(filename, path, frames, use_index):
+    """
+    seek to every frame and collect the latency until its first frame is decoded
+    :return: list of float seconds
+    """
+    player = VideoPlayer(filename, path, hasSound=False, useKeyframeIndex=use_index)
+    for count, frame in enumerate(frames, 1):
+        player.set_frame(frame)
+        deadline = time.perf_counter() + TIMEOUT
+        while len(player.seek_latency) < count and time.perf_counter() < deadline:
+            time.sleep(0.0005)
+
+    return player.seek_latency
+
+
+def report(name, latencies):
+    latencies = sorted(latencies)
+    print("%-16s seeks %4d  min %7.1f ms  median %7.1f ms  p95 %7.1f ms  max %7.1f ms" % (
+        name, len(latencies),
+        latencies[0] * 1000,
+        statistics.median(latencies) * 1000,
+        latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        latencies[-1] * 1000
+    ))
+
+
+if __name__ == "__main__":
+    filename = sys.argv[1] if len(sys.argv) > 1 else "fbms.mp4"
+    path = sys.argv[2] if len(sys.argv) > 2 else "../rsc_testing"
+    seeks = int(sys.argv[3]) if len(sys.argv) > 3 else 50
+
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+
+    probe = VideoPlayer(filename, path, hasSound=False)
+    random.seed(0)
+    frames = [random.randrange(probe.video_data["DURATION"]) for _ in range(seeks)]
+
+    report("keyframe index", measure(filename, path, frames, True))
+    report("ffmpeg -ss", measure(filename, path, frames, False))
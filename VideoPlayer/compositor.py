@@ -0,0 +1,208 @@
+"""
+compositor -> many players share one pool of decoder workers and are drawn with a single batched blit
+"""
+import os  # os module -> for the cpu count
+import threading  # threading module -> for the worker pool
+
+VISIBLE_PRIORITY = 0  # decoders of on-screen players are served first
+HIDDEN_PRIORITY = 1  # off-screen players only get idle workers
+
+
+class DecoderScheduler(object):
+    """
+    Scheduler class runs frame decoders on a fixed pool of worker threads.
+    Each step decodes one frame of the decoder with the highest priority and the emptiest queue,
+    so a 16 clip HUD needs as many threads as cores instead of one per clip.
+    """
+
+    def __init__(self, workers=None):
+        """
+        constructor -> start the workers
+        :param workers: number of worker threads, defaults to the cpu count
+        """
+        self._decoders = []  # registered decoders
+        self._busy = set()  # decoders a worker is stepping right now
+        self._condition = threading.Condition()
+        self._running = True
+        self._threads = [
+            threading.Thread(target=self._run, daemon=True) for _ in range(workers or os.cpu_count() or 1)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def register(self, decoder):
+        """
+        add a decoder, called by FrameDecoder
+        :param decoder: FrameDecoder
+        :return: None
+        """
+        with self._condition:
+            self._decoders.append(decoder)
+            self._condition.notify_all()
+
+    def unregister(self, decoder):
+        """
+        remove a decoder, called by FrameDecoder.stop
+        :param decoder: FrameDecoder
+        :return: None
+        """
+        with self._condition:
+            if decoder in self._decoders:
+                self._decoders.remove(decoder)
+
+    def wake(self):
+        """
+        wake idle workers, called when a consumer released buffers
+        :return: None
+        """
+        with self._condition:
+            self._condition.notify_all()
+
+    def _next_decoder(self):
+        """
+        pick the decoder that needs a frame most, the caller holds the condition
+        :return: FrameDecoder or None
+        """
+        candidates = [decoder for decoder in self._decoders if decoder not in self._busy and decoder.ready]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda decoder: (decoder.priority, decoder.queue_depth))
+
+    def _run(self):
+        """
+        worker loop, sleeps while every decoder is full
+        :return: None
+        """
+        while self._running:
+            with self._condition:
+                decoder = self._next_decoder()
+                if decoder is None:
+                    self._condition.wait(0.01)  # woken by consumers, timeout covers missed wakes
+                    continue
+                self._busy.add(decoder)
+
+            try:
+                if not decoder.step():
+                    self.unregister(decoder)  # pipe exhausted
+            finally:
+                with self._condition:
+                    self._busy.discard(decoder)
+
+    def shutdown(self):
+        """
+        stop the workers, registered decoders are left to their players
+        :return: None
+        """
+        self._running = False
+        self.wake()
+        for thread in self._threads:
+            thread.join()
+
+
+class PlayerGroup(object):
+    """
+    Group class drives many VideoPlayers with one update call per frame.
+    Players are created with the group scheduler, on-screen players get decoding priority and
+    every visible frame is drawn onto the target with one Surface.blits call.
+    """
+
+    def __init__(self, target, workers=None):
+        """
+        constructor -> setting default args
+        :param target: pygame Surface the players are drawn onto
+        :param workers: decoder worker threads, defaults to the cpu count
+        """
+        self._target = target  # assign target surface
+        self.scheduler = DecoderScheduler(workers)  # pass as scheduler= to VideoPlayer
+        self._players = []  # players in draw order
+        self._hidden = set()  # players hidden by the caller
+
+    @property
+    def players(self):
+        """
+        returns players in draw order
+        :return: list of VideoPlayer
+        """
+        return list(self._players)
+
+    def add(self, player, visible=True):
+        """
+        add a player, drawn above the players added before
+        :param player: VideoPlayer created with scheduler=group.scheduler
+        :param visible: boolean
+        :return: VideoPlayer
+        """
+        self._players.append(player)
+        self.set_visible(player, visible)
+        return player
+
+    def remove(self, player):
+        """
+        remove a player, the caller keeps ownership
+        :param player: VideoPlayer
+        :return: None
+        """
+        self._players.remove(player)
+        self._hidden.discard(player)
+
+    def set_visible(self, player, visible):
+        """
+        show or hide a player, hidden players keep playing at low decoding priority
+        :param player: VideoPlayer
+        :param visible: boolean
+        :return: None
+        """
+        if visible:
+            self._hidden.discard(player)
+        else:
+            self._hidden.add(player)
+
+    def _on_screen(self, player):
+        """
+        check if a player is visible and overlaps the target
+        :param player: VideoPlayer
+        :return: boolean
+        """
+        return player not in self._hidden and player.rect.colliderect(self._target.get_rect())
+
+    def play(self):
+        for player in self._players:
+            player.play()
+
+    def pause(self):
+        for player in self._players:
+            player.pause()
+
+    def unpause(self):
+        for player in self._players:
+            player.unpause()
+
+    def stop(self):
+        for player in self._players:
+            player.stop()
+
+    def update(self):
+        """
+        advance every player and draw the visible ones, call once per frame
+        :return: list of pygame Rect that changed
+        """
+        blit_sequence = []
+        for player in self._players:
+            on_screen = self._on_screen(player)
+            player.priority = VISIBLE_PRIORITY if on_screen else HIDDEN_PRIORITY
+            player.update()
+            if on_screen:
+                blit_sequence.append(player.blit_item)
+
+        return self._target.blits(blit_sequence)
+
+    def close(self):
+        """
+        close every player and stop the workers
+        :return: None
+        """
+        for player in self._players:
+            player.close()
+        self._players = []
+        self._hidden.clear()
+        self.scheduler.shutdown()
@@ -0,0 +1,103 @@
+"""
+decode configuration -> ffmpeg thread counts from the core count and the number of active players,
+plus gop aligned segment plans for decoding high resolution clips with several ffmpeg processes
+"""
+import os  # os module -> for the cpu count
+import threading  # threading module -> player count is shared
+
+MAX_THREADS = 16  # ffmpeg frame threading stops scaling (and warns) above this
+SEGMENT_PIXELS = 3840 * 2160  # clips with at least this many pixels per frame are segmented by default
+SEGMENT_FRAMES = 120  # minimum frames per segment, short gops are merged up to this length
+
+_players = 0  # players currently holding a decoder
+_lock = threading.Lock()
+
+
+def register_player():
+    """
+    count a player that decodes, called once per player
+    :return: None
+    """
+    global _players
+    with _lock:
+        _players += 1
+
+
+def unregister_player():
+    """
+    release a player registered with register_player
+    :return: None
+    """
+    global _players
+    with _lock:
+        _players = max(_players - 1, 0)
+
+
+def active_players():
+    """
+    returns the number of decoding players
+    :return: int
+    """
+    with _lock:
+        return _players
+
+
+def cpu_count():
+    """
+    returns the cores this process may run on
+    :return: int
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))  # respects taskset and container cpu sets
+    return os.cpu_count() or 1
+
+
+def decode_threads(players=None, processes=1, cores=None):
+    """
+    share the cores between every decoding ffmpeg process
+    :param players: active players, defaults to the registered count
+    :param processes: ffmpeg processes per player
+    :param cores: available cores, defaults to cpu_count()
+    :return: int -threads value, at least 1
+    """
+    players = max(active_players() if players is None else players, 1)
+    cores = cores or cpu_count()
+    return max(1, min(cores // (players * max(processes, 1)), MAX_THREADS))
+
+
+def decode_processes(resolution, players=None, cores=None):
+    """
+    pick the number of segment processes for a clip
+    :param resolution: (int w, int h) of the decoded frames
+    :param players: active players, defaults to the registered count
+    :param cores: available cores, defaults to cpu_count()
+    :return: int, 1 disables segmented decoding
+    """
+    if resolution[0] * resolution[1] < SEGMENT_PIXELS:
+        return 1  # a single process keeps up below 4k
+
+    players = max(active_players() if players is None else players, 1)
+    cores = cores or cpu_count()
+    return max(1, min(cores // (players * 2), 4))  # at least two threads per process, gains flatten past 4
+
+
+def plan_segments(keyframes, start, end, min_frames=SEGMENT_FRAMES):
+    """
+    split a frame range at keyframes, every segment but the first starts on a keyframe
+    :param keyframes: sorted keyframe frame numbers
+    :param start: first frame
+    :param end: frame after the last one
+    :param min_frames: minimum frames per segment
+    :return: list of (first frame, end frame)
+    """
+    segments = []
+    segment_start = start
+    for keyframe in keyframes:
+        if keyframe <= segment_start or keyframe >= end:
+            continue
+        if keyframe - segment_start >= min_frames:
+            segments.append((segment_start, keyframe))
+            segment_start = keyframe
+
+    segments.append((segment_start, end))
+    return segments
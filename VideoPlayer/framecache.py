@@ -0,0 +1,248 @@
+"""
+raw frame cache -> small header plus fixed stride frames, opened with mmap for O(1) random access
+"""
+import mmap  # mmap module -> frames are served from the page cache
+import os  # os module -> for path and file checking
+import struct  # struct module -> for the header
+import sys  # sys module -> for the byte order
+import subprocess  # subprocess module -> for ffmpeg communication
+import time  # time module -> for latency fields
+
+import pygame  # pygame module -> for frame surfaces
+
+MAGIC = b"PGMF"  # file signature
+VERSION = 1
+HEADER = struct.Struct("<4sHHII8sdI")  # magic, version, header size, width, height, pix fmt, fps, frame count
+HEADER_SIZE = 64  # frames start on an aligned offset
+
+# ffmpeg pixel format -> (bytes per pixel, pygame buffer format)
+PIXEL_FORMATS = {
+    "rgb24": (3, "RGB"),
+    "rgba": (4, "RGBA"),
+    "rgb0": (4, "RGBX"),
+    "bgra": (4, "BGRA"),
+}
+ALPHA_FORMATS = ("RGBA", "BGRA")  # buffer formats pygame maps to per pixel alpha surfaces
+
+
+def _supports_buffer_format(buffer_format):
+    """
+    check if this pygame can wrap a buffer format, BGRA needs pygame 2.1.3
+    :return: boolean
+    """
+    try:
+        pygame.image.frombuffer(bytearray(4), (1, 1), buffer_format)
+    except ValueError:
+        return False
+    return True
+
+
+def native_pix_fmt(surface=None):
+    """
+    pick the ffmpeg pixel format whose memory layout matches a 32 bit target,
+    frames in that layout blit without per pixel conversion
+    :param surface: target pygame Surface, defaults to the display surface
+    :return: key of PIXEL_FORMATS, rgb24 if no layout matches
+    """
+    surface = surface if surface is not None else pygame.display.get_surface()
+    if surface is None or surface.get_bitsize() != 32 or sys.byteorder != "little":
+        return "rgb24"
+
+    red, green, blue, _ = surface.get_masks()
+    if (red, green, blue) == (0xff, 0xff00, 0xff0000):
+        return "rgb0"  # bytes R G B X
+    if (red, green, blue) == (0xff0000, 0xff00, 0xff) and _supports_buffer_format("BGRA"):
+        return "bgra"  # bytes B G R X, the usual desktop layout
+    return "rgb0"  # still 32 bit, pygame only swaps channels
+
+
+def frame_surface(frame_buffer, resolution, buffer_format):
+    """
+    wrap a frame buffer in a surface without copying
+    :param frame_buffer: bytes like object of one frame
+    :param resolution: (int w, int h)
+    :param buffer_format: pygame buffer format
+    :return: pygame Surface
+    """
+    surface = pygame.image.frombuffer(frame_buffer, resolution, buffer_format)
+    if buffer_format in ALPHA_FORMATS:
+        surface.set_alpha(None)  # video frames are opaque, blit as a plain copy instead of blending
+    return surface
+
+
+def is_stale(cache_file, video_file):
+    """
+    check if a cache file is missing or older than its video
+    :return: boolean
+    """
+    return not os.path.isfile(cache_file) or os.path.getmtime(cache_file) < os.path.getmtime(video_file)
+
+
+def cache_path(destination, filename):
+    """
+    get the cache file of a clip, shared by VideoPlayer and pygmov.Movie
+    :param destination: resource folder of the clip
+    :param filename: name of the decoded video file
+    :return: path
+    """
+    return os.path.join(destination, "FRAMES_%s.frames" % filename)
+
+
+def build(video_file, cache_file, resolution, fps=0.0, ffmpeg_binary="ffmpeg", pix_fmt="rgb24", threads=0):
+    """
+    decode a video once into a frame cache file
+    :param video_file: source video
+    :param cache_file: cache path
+    :param resolution: (int w, int h) of the stored frames
+    :param fps: frame rate stored in the header
+    :param ffmpeg_binary: ffmpeg executable
+    :param pix_fmt: key of PIXEL_FORMATS
+    :param threads: ffmpeg -threads value
+    :return: None
+    """
+    stride = resolution[0] * resolution[1] * PIXEL_FORMATS[pix_fmt][0]
+    command = [
+        ffmpeg_binary,
+        '-nostdin', '-loglevel', 'fatal',
+        '-i', video_file,
+        '-threads', str(threads),
+        '-vf', 'scale=%d:%d' % (resolution[0], resolution[1]),
+        '-f', 'rawvideo',
+        '-pix_fmt', pix_fmt, '-'
+    ]
+
+    directory = os.path.dirname(cache_file)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory, exist_ok=True)  # resource folders only exist once something was prepared
+
+    partial_file = cache_file + ".partial"
+    frames = 0
+    with open(partial_file, "wb") as cache:
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        try:
+            cache.write(bytes(HEADER_SIZE))  # header is written once the frame count is known
+            frame_buffer = bytearray(stride)
+            while process.stdout.readinto(frame_buffer) == stride:
+                cache.write(frame_buffer)
+                frames += 1
+            cache.seek(0)
+            cache.write(HEADER.pack(MAGIC, VERSION, HEADER_SIZE, resolution[0], resolution[1],
+                                    pix_fmt.encode("ascii"), fps, frames))
+        except BaseException:
+            process.kill()  # never leave ffmpeg running behind a failed write
+            process.wait()
+            cache.close()
+            os.remove(partial_file)
+            raise
+    process.wait()
+
+    if process.returncode != 0 or frames == 0:
+        os.remove(partial_file)
+        raise subprocess.CalledProcessError(process.returncode, command)
+
+    os.replace(partial_file, cache_file)
+
+
+class FrameCache(object):
+    """
+    Frame cache class maps a cache file and serves frames without decoding
+    """
+
+    def __init__(self, cache_file, raw_format=None):
+        """
+        constructor -> map the file
+        :param cache_file: cache path
+        :param raw_format: (width, height, pix fmt, fps) to open a header-less dump of frames
+        """
+        self._file = open(cache_file, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)  # read only shared mapping
+
+        if raw_format is None:
+            magic, version, header_size, width, height, pix_fmt, fps, frames = HEADER.unpack_from(self._map)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError("Not a frame cache file > ", cache_file)
+            pix_fmt = pix_fmt.rstrip(b"\0").decode("ascii")
+        else:
+            width, height, pix_fmt, fps = raw_format
+            header_size = 0
+            frames = None
+
+        self.resolution = (width, height)
+        self.pix_fmt = pix_fmt
+        self.fps = fps
+        self.stride = width * height * PIXEL_FORMATS[pix_fmt][0]  # bytes per frame
+        self.format = PIXEL_FORMATS[pix_fmt][1]  # pygame buffer format
+        self._offset = header_size
+        self._view = memoryview(self._map)
+        self.total_frames = frames if frames is not None else (len(self._map) - header_size) // self.stride
+
+    def __len__(self):
+        return self.total_frames
+
+    def frame(self, index):
+        """
+        get the raw bytes of a frame without copying
+        :param index: frame index
+        :return: memoryview
+        """
+        if not 0 <= index < self.total_frames:
+            raise IndexError("Frame index out of range > ", index)
+
+        start = self._offset + index * self.stride
+        return self._view[start:start + self.stride]
+
+    def surface(self, index):
+        """
+        get a surface sharing the mapped memory of a frame
+        :param index: frame index
+        :return: pygame Surface
+        """
+        return frame_surface(self.frame(index), self.resolution, self.format)
+
+    def close(self):
+        """
+        unmap the file, surfaces from this cache must not be used afterwards
+        :return: None
+        """
+        self._view.release()
+        try:
+            self._map.close()
+        except BufferError:
+            pass  # frame surfaces are still alive, the map is unmapped once they are collected
+        self._file.close()
+
+
+class CachedFrameDecoder(object):
+    """
+    Decoder class with the FrameDecoder interface, frames come from a FrameCache
+    """
+
+    def __init__(self, frame_cache, started=None):
+        """
+        constructor -> setting default args
+        :param frame_cache: FrameCache
+        :param started: perf_counter time the decoder was requested
+        """
+        self._frame_cache = frame_cache
+        self.underruns = 0  # a mapped frame is always ready
+        self.dropped_frames = 0  # skipped frames are never read
+        self.queue_depth = 0
+        self.first_frame_latency = time.perf_counter() - started if started is not None else 0.0
+
+    @property
+    def finished(self):
+        return False
+
+    def get_frame(self, index):
+        """
+        get a frame in O(1)
+        :param index: wanted frame index
+        :return: (index, pygame Surface), the last frame past the end
+        """
+        index = min(index, self._frame_cache.total_frames - 1)
+        if index < 0:
+            return None
+        return index, self._frame_cache.surface(index)
+
+    def stop(self):
+        pass
@@ -0,0 +1,182 @@
+"""
+instrumentation -> opt-in per stage timers and counters for a VideoPlayer, exported as snapshots or callbacks.
+Players hold None while disabled, so the only cost then is one attribute check per stage.
+"""
+import collections  # collections module -> for the sample window
+import threading  # threading module -> stages are written from several threads
+import time  # time module -> for callback intervals
+
+# stages timed by VideoPlayer and its decoder
+PIPE_READ = "PIPE_READ"  # decoder thread filling a frame buffer from ffmpeg
+GET_FRAME = "GET_FRAME"  # consumer popping the due frame from the decoder queue
+SCALE = "SCALE"  # pygame scaling of cached frames
+RENDER = "RENDER"  # blit in render()
+AUDIO = "AUDIO"  # audio start and repositioning calls
+SEEK = "SEEK"  # set_frame, including the ffmpeg restart
+UPDATE = "UPDATE"  # whole update() call
+
+# counters
+FRAMES_DECODED = "FRAMES_DECODED"
+FRAMES_SHOWN = "FRAMES_SHOWN"
+FRAMES_DROPPED = "FRAMES_DROPPED"
+FRAMES_REPEATED = "FRAMES_REPEATED"
+UNDERRUNS = "UNDERRUNS"
+AUDIO_UNDERRUNS = "AUDIO_UNDERRUNS"
+PIPE_BYTES = "PIPE_BYTES"
+PROCESS_RESTARTS = "PROCESS_RESTARTS"
+CATCH_UP_SEEKS = "CATCH_UP_SEEKS"
+
+
+class StageTimer(object):
+    """
+    Timer class aggregates the durations of one stage, a bounded window of samples gives percentiles.
+    Not thread safe by itself, Instrumentation serialises every access.
+    """
+
+    def __init__(self, window=512):
+        """
+        constructor -> setting default args
+        :param window: samples kept for percentiles
+        """
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+        self._samples = collections.deque(maxlen=window)
+
+    def add(self, seconds):
+        """
+        record one duration
+        :param seconds: float
+        :return: None
+        """
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+        if seconds > self.max:
+            self.max = seconds
+        self._samples.append(seconds)
+
+    def percentile(self, fraction):
+        """
+        percentile over the sample window
+        :param fraction: float between 0 and 1
+        :return: float seconds
+        """
+        samples = sorted(self._samples)
+        if not samples:
+            return 0.0
+        return samples[min(int(len(samples) * fraction), len(samples) - 1)]
+
+    def snapshot(self):
+        """
+        returns the stage statistics in milliseconds
+        :return: dictionary
+        """
+        return {
+            "COUNT": self.count,
+            "TOTAL_MS": self.total * 1000,
+            "MEAN_MS": self.total * 1000 / self.count if self.count else 0.0,
+            "P95_MS": self.percentile(0.95) * 1000,
+            "MAX_MS": self.max * 1000,
+            "LAST_MS": self.last * 1000,
+        }
+
+
+class Instrumentation(object):
+    """
+    Instrumentation class collects stage timers and counters.
+    The game thread, the audio pump and every decoder of a player (the next loop pass, scheduler workers)
+    write concurrently, so timers and counters are only touched under a lock held for a few operations.
+    """
+
+    def __init__(self, window=512):
+        """
+        constructor -> setting default args
+        :param window: samples kept per stage for percentiles
+        """
+        self._window = window
+        self._stages = {}  # stage -> StageTimer
+        self._counters = collections.Counter()
+        self._callbacks = []  # [callback, interval, next call time]
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()  # guards stages and counters
+
+    def add(self, stage, seconds):
+        """
+        record the duration of a stage
+        :param stage: stage name
+        :param seconds: float
+        :return: None
+        """
+        with self._lock:
+            timer = self._stages.get(stage)
+            if timer is None:
+                timer = self._stages[stage] = StageTimer(self._window)
+            timer.add(seconds)
+
+    def count(self, counter, amount=1):
+        """
+        increase a counter
+        :param counter: counter name
+        :param amount: int
+        :return: None
+        """
+        with self._lock:
+            self._counters[counter] += amount
+
+    def snapshot(self):
+        """
+        returns every stage and counter
+        :return: dictionary
+        """
+        with self._lock:
+            return {
+                "SECONDS": time.perf_counter() - self._started,
+                "STAGES": dict((stage, timer.snapshot()) for stage, timer in self._stages.items()),
+                "COUNTERS": dict(self._counters),
+            }
+
+    def reset(self):
+        """
+        clear all stages and counters, callbacks stay registered
+        :return: None
+        """
+        with self._lock:
+            self._stages = {}
+            self._counters = collections.Counter()
+            self._started = time.perf_counter()
+
+    def add_callback(self, callback, interval=1.0):
+        """
+        call back with a snapshot at most every interval seconds, driven by VideoPlayer.update
+        :param callback: callable receiving the snapshot dictionary
+        :param interval: seconds, 0 calls on every update
+        :return: None
+        """
+        self._callbacks.append([callback, interval, time.perf_counter() + interval])
+
+    def remove_callback(self, callback):
+        """
+        unregister a callback
+        :param callback: callable passed to add_callback
+        :return: None
+        """
+        self._callbacks = [entry for entry in self._callbacks if entry[0] is not callback]
+
+    def poll(self):
+        """
+        run due callbacks
+        :return: None
+        """
+        if not self._callbacks:
+            return
+
+        now = time.perf_counter()
+        snapshot = None
+        for entry in self._callbacks:
+            if now >= entry[2]:
+                if snapshot is None:
+                    snapshot = self.snapshot()  # shared by every callback due now
+                entry[2] = now + entry[1]
+                entry[0](snapshot)
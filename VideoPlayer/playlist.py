@@ -0,0 +1,153 @@
+"""
+playlist -> plays clips back to back, every clip is prepared up front and the next VideoPlayer is opened
+and warmed in the background before the current one ends so the switch is a swap instead of a process start
+"""
+import concurrent.futures  # concurrent module -> for the background open
+
+from videoplayer import VideoPlayer  # players of the clips
+
+
+class Playlist(object):
+    """
+    Playlist class drives one VideoPlayer at a time with the same options for every clip.
+    Conversion, resizing and audio extraction of all clips start in the constructor.
+    Once the current clip has PRELOAD_SECONDS left the next player is constructed on a worker thread,
+    its decoder fills the queue and its audio reads the first chunks, then it takes over on the frame the
+    current clip ends.
+    """
+
+    def __init__(self, clips, position=(0, 0), loop=False, **options):
+        """
+        constructor -> prepare every clip and open the first one
+        :param clips: iterable of (filename, path)
+        :param position: position where to render
+        :param loop: boolean if the playlist should start over after the last clip
+        :param options: VideoPlayer keyword arguments used for every clip
+        """
+        self._clips = [tuple(clip) for clip in clips]  # assign clips
+        if not self._clips:
+            raise ValueError("Playlist needs at least one clip")
+
+        self._position = position  # render position of every player
+        self._loop = loop  # start over after the last clip
+        self._options = dict(options)  # shared player options
+        self._options.setdefault("bindGUI", False)
+        if loop and len(self._clips) == 1:
+            self._options["loop"] = True  # a single clip loops inside its player
+
+        # the artifacts the players will ask for, a transcode never runs inside the late open
+        use_wave = self._options.get("hasSound", True) and (
+            self._options.get("audioCache", False) or not self._options.get("streamAudio", True))
+        self._jobs = VideoPlayer.preload([(filename, path, self._options.get("resolution"),
+                                           self._options.get("doVideoConvert", True),
+                                           self._options.get("doVideoResize", True), use_wave)
+                                          for filename, path in self._clips])
+
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)  # opens the next player
+        self._pending = None  # future of the next player
+        self._index = 0  # index of the current clip
+        self._player = self._open(0)  # current player
+        self._is_playing = False  # boolean to toggle playback
+
+    def _open(self, index):
+        """
+        construct and warm the player of a clip once its preparation finished
+        :param index: clip index
+        :return: VideoPlayer
+        """
+        self._jobs[index].result()  # raises if the preparation failed
+        filename, path = self._clips[index]
+        player = VideoPlayer(filename, path, self._position, **self._options)
+        player.warm()
+        return player
+
+    def _next_index(self):
+        """
+        get the clip following the current one
+        :return: int or None after the last clip
+        """
+        if self._index + 1 < len(self._clips):
+            return self._index + 1
+        if self._loop and len(self._clips) > 1:
+            return 0
+        return None
+
+    @property
+    def current(self):
+        """
+        returns the playing player
+        :return: VideoPlayer
+        """
+        return self._player
+
+    @property
+    def index(self):
+        """
+        returns the index of the playing clip
+        :return: int
+        """
+        return self._index
+
+    def play(self):
+        self._is_playing = True
+        self._player.play()
+
+    def pause(self):
+        self._is_playing = False
+        self._player.pause()
+
+    def unpause(self):
+        self._is_playing = True
+        self._player.unpause()
+
+    def stop(self):
+        self._is_playing = False
+        self._player.stop()
+
+    def update(self):
+        """
+        advance the current player, open the next one ahead and swap on the last frame
+        :return: None
+        """
+        self._player.update()
+
+        index = self._next_index()
+        if index is None:
+            return
+
+        if self._pending is None and self._player.remaining <= VideoPlayer.PRELOAD_SECONDS:
+            self._pending = self._executor.submit(self._open, index)
+
+        if self._player.finished:
+            if self._pending is None:
+                self._pending = self._executor.submit(self._open, index)
+            # blocks while the next clip is still being prepared or if this one was shorter than the preload time
+            player = self._pending.result()
+            self._pending = None
+            self._player.close()
+            self._player, self._index = player, index
+            if self._is_playing:
+                self._player.play()
+                self._player.update()  # first frame of the next clip on this very frame
+
+    def render(self, surface):
+        """
+        renders the current frame to a surface
+        :param surface: pygame Surface
+        :return: None
+        """
+        self._player.render(surface)
+
+    def close(self):
+        """
+        close the current and the pre-opened player, drop queued preparations and stop the worker
+        :return: None
+        """
+        for job in self._jobs:
+            job.future.cancel()  # clips not started yet, running ones finish
+        self.stop()
+        self._player.close()
+        if self._pending is not None:
+            self._pending.result().close()
+            self._pending = None
+        self._executor.shutdown()
@@ -0,0 +1,92 @@
+"""
+batch pre-transcode -> builds the resources_<name> artifacts of every clip in a directory
+usage: python precache.py <directory> [--resolution 500x500] [--workers 8] [--audio-cache] [--no-convert]
+"""
+import argparse
+import os
+import time
+
+from prepare import PARTIAL_PREFIX, RESOURCES_PATH, PreparationPipeline
+from videoplayer import VideoPlayer
+
+EXTENSIONS = (".mp4", ".mpg", ".mpeg", ".mov", ".mkv", ".avi", ".webm", ".m4v", ".wmv", ".flv")
+OUTPUT_PREFIXES = (PARTIAL_PREFIX, "SCALED_")  # artifacts of prepared clips, never sources
+
+
+def find_clips(directory, extensions=EXTENSIONS):
+    """
+    walk a directory for video files, the resources folder and prepared artifacts are skipped
+    :param directory: root directory
+    :param extensions: accepted file extensions
+    :return: list of (filename, path)
+    """
+    resources = os.path.realpath(RESOURCES_PATH)
+    clips = []
+    for path, dirnames, filenames in os.walk(directory):
+        dirnames[:] = [name for name in dirnames if os.path.realpath(os.path.join(path, name)) != resources]
+        for filename in sorted(filenames):
+            if filename.lower().endswith(extensions) and not filename.startswith(OUTPUT_PREFIXES):
+                clips.append((filename, path))
+    return clips
+
+
+def parse_resolution(value):
+    """
+    parse WIDTHxHEIGHT
+    :param value: string
+    :return: (int w, int h)
+    """
+    width, _, height = value.lower().partition("x")
+    return int(width), int(height)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-build VideoPlayer resources for a directory of clips.")
+    parser.add_argument("directory", help="directory to scan recursively")
+    parser.add_argument("--resolution", type=parse_resolution, default=None, help="build SCALED_ variants, e.g. 500x500")
+    parser.add_argument("--workers", type=int, default=None, help="concurrent clips, defaults to the cpu count")
+    parser.add_argument("--audio-cache", action="store_true",
+                        help="extract wave files, only read by players with audioCache=True or streamAudio=False")
+    parser.add_argument("--no-convert", action="store_true", help="skip mp4 conversion")
+    parser.add_argument("--ffmpeg", default=VideoPlayer.FFMPEG_BINARY, help="ffmpeg executable")
+    parser.add_argument("--ffprobe", default=VideoPlayer.FFPROBE_BINARY, help="ffprobe executable")
+    arguments = parser.parse_args()
+
+    clips = find_clips(arguments.directory)
+    print("[INFO] Found %d clips in %s" % (len(clips), arguments.directory))
+
+    pipeline = PreparationPipeline(arguments.workers, arguments.ffmpeg, arguments.ffprobe, VideoPlayer.THREAD_NUMBERS)
+    started = time.perf_counter()
+    jobs = [
+        (pipeline.submit(filename, path, arguments.resolution, not arguments.no_convert, True, arguments.audio_cache),
+         os.path.join(path, filename))
+        for filename, path in clips
+    ]
+
+    built, skipped, failed, built_bytes = 0, 0, 0, 0
+    for job, source in jobs:
+        try:
+            plan = job.result()
+        except Exception as error:
+            failed += 1
+            print("[ERROR] %s > %s" % (source, error))
+            continue
+
+        if plan["OUTPUTS"]:
+            built += 1
+            built_bytes += os.path.getsize(source)
+            print("[INFO] Built    %s (%d artifacts)" % (source, len(plan["OUTPUTS"])))
+        else:
+            skipped += 1
+            print("[INFO] Up to date %s" % source)
+
+    pipeline.shutdown()
+    elapsed = time.perf_counter() - started
+
+    print("[INFO] Built %d, up to date %d, failed %d in %.1f s" % (built, skipped, failed, elapsed))
+    if elapsed > 0:
+        print("[INFO] Throughput %.2f clips/s, %.2f MB/s" % (built / elapsed, built_bytes / elapsed / 1000000.0))
+
+
+if __name__ == "__main__":
+    main()
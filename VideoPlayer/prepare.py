@@ -0,0 +1,295 @@
+"""
+asset preparation -> convert, resize and audio extraction in a single ffmpeg pass per clip,
+clips are prepared concurrently with a future / progress api
+"""
+import concurrent.futures  # futures module -> for the job pool
+import os  # os module -> for path and file checking
+import subprocess  # subprocess module -> for ffmpeg communication
+import threading  # threading module -> for progress updates
+
+from probe import probe  # cached ffprobe metadata
+
+RESOURCES_PATH = "resources"  # 'home' folder of every prepared clip
+PARTIAL_PREFIX = "PARTIAL_"  # outputs are renamed once ffmpeg succeeded
+
+_building = {}  # output path -> Event set once the ffmpeg run writing it ended
+_building_lock = threading.Lock()
+
+
+def destination_path(filename):
+    """
+    get the resource folder of a clip
+    :param filename: source filename
+    :return: path
+    """
+    return os.path.join(RESOURCES_PATH, "resources_" + filename)
+
+
+def up_to_date(output, source):
+    """
+    check if an artifact exists and is not older than its source
+    :param output: artifact path
+    :param source: source path
+    :return: boolean
+    """
+    return os.path.isfile(output) and os.path.getmtime(output) >= os.path.getmtime(source)
+
+
+def plan_clip(filename, path="", resolution=None, convert=True, resize=True, audio=True, ffprobe_binary="ffprobe"):
+    """
+    work out which artifacts a clip needs and which of them are missing
+    :param filename: source filename
+    :param path: source path
+    :param resolution: (int w, int h) of the SCALED_ variant or None
+    :param convert: boolean if non mp4 sources should be converted
+    :param resize: boolean if the SCALED_ variant should be built
+    :param audio: boolean if the audio should be extracted as wave file
+    :param ffprobe_binary: ffprobe executable
+    :return: plan dictionary
+    """
+    source = os.path.join(path, filename)
+    if not os.path.isfile(source):  # check if file exists
+        raise FileNotFoundError("File or path incorrect > ", path, filename)
+
+    destination = destination_path(filename)
+    stem = filename.split(".")[0]
+    source_data = probe(source, ffprobe_binary)
+    outputs = []  # (final path, ffmpeg output arguments)
+
+    # playable video -> SCALED_ variant, converted mp4 or the source itself
+    video = source
+    if not filename.endswith(".mp4") and convert:
+        video = os.path.join(destination, stem + ".mp4")
+        if not up_to_date(video, source):
+            outputs.append((video, []))
+
+    if resolution is not None and resize:
+        scaled = os.path.join(destination, "SCALED_%s.mp4" % stem)
+        if not up_to_date(scaled, source) or tuple(probe(scaled, ffprobe_binary)["RESOLUTION"]) != tuple(resolution):
+            outputs.append((scaled, ["-vf", "scale=%d:%d" % (resolution[0], resolution[1])]))
+        video = scaled
+
+    # wave file -> only if the source has an audio stream
+    wave_file = None
+    if audio and source_data["AUDIO"] is not None:
+        wave_file = os.path.join(destination, stem + ".wav")
+        if not up_to_date(wave_file, source):
+            outputs.append((wave_file, ["-vn", "-ar", "44100", "-ac", "2"]))  # mixer format
+
+    return {
+        "SOURCE": source,
+        "DESTINATION": destination,
+        "VIDEO": video,
+        "AUDIO": wave_file,
+        "SOURCE_AUDIO": source_data["AUDIO"],
+        "DURATION": source_data["DURATION"],
+        "OUTPUTS": outputs,
+    }
+
+
+def _claim_outputs(plan):
+    """
+    wait for runs already writing outputs of the plan, then claim the outputs that are still missing,
+    so a preload and a player constructor never write the same PARTIAL_ file
+    :param plan: plan dictionary from plan_clip
+    :return: (list of (final path, ffmpeg output arguments), Event to set once they are written)
+    """
+    waited = set()  # outputs another run may have built meanwhile
+    while True:
+        with _building_lock:
+            running = [(output, _building[output]) for output, _ in plan["OUTPUTS"] if output in _building]
+            if not running:
+                outputs = [(output, arguments) for output, arguments in plan["OUTPUTS"]
+                           if output not in waited or not up_to_date(output, plan["SOURCE"])]
+                finished = threading.Event()
+                for output, _ in outputs:
+                    _building[output] = finished
+                return outputs, finished
+
+        for output, event in running:
+            event.wait()
+            waited.add(output)
+
+
+def run_plan(plan, ffmpeg_binary="ffmpeg", threads=0, progress=None):
+    """
+    build every missing output of a plan with one ffmpeg invocation, the source is decoded once
+    :param plan: plan dictionary from plan_clip
+    :param ffmpeg_binary: ffmpeg executable
+    :param threads: ffmpeg -threads value
+    :param progress: callable receiving a float between 0 and 1
+    :return: plan dictionary
+    """
+    outputs, finished = _claim_outputs(plan)
+    try:
+        _build_outputs(plan, outputs, ffmpeg_binary, threads, progress)
+    finally:
+        with _building_lock:
+            for output, _ in outputs:
+                del _building[output]
+        finished.set()
+    return plan
+
+
+def _build_outputs(plan, outputs, ffmpeg_binary, threads, progress):
+    """
+    write outputs of a plan through PARTIAL_ files
+    :param plan: plan dictionary from plan_clip
+    :param outputs: list of (final path, ffmpeg output arguments) claimed by this run
+    :return: None
+    """
+    if not outputs:
+        if progress is not None:
+            progress(1.0)
+        return  # everything is up to date
+
+    if not os.path.isdir(plan["DESTINATION"]):
+        os.makedirs(plan["DESTINATION"], exist_ok=True)  # create folder for the clip
+
+    command = [
+        ffmpeg_binary,
+        '-nostdin', '-y',
+        '-loglevel', 'error',
+        '-progress', 'pipe:1',
+        '-i', plan["SOURCE"]
+    ]
+
+    partial_files = []
+    for output, arguments in outputs:
+        directory, name = os.path.split(output)
+        partial_files.append(os.path.join(directory, PARTIAL_PREFIX + name))
+        command += ['-threads', str(threads)] + arguments + [partial_files[-1]]
+
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    for line in process.stdout:
+        key, _, value = line.decode("utf-8").strip().partition("=")
+        if key in ("out_time_us", "out_time_ms") and value.isdigit() and plan["DURATION"] and progress is not None:
+            progress(min(int(value) / 1000000.0 / plan["DURATION"], 1.0))
+    process.wait()
+
+    if process.returncode != 0:
+        for partial_file in partial_files:
+            if os.path.isfile(partial_file):
+                os.remove(partial_file)  # never leave half written artifacts behind
+        raise subprocess.CalledProcessError(process.returncode, command)
+
+    for (output, _), partial_file in zip(outputs, partial_files):
+        os.replace(partial_file, output)
+
+    if progress is not None:
+        progress(1.0)
+
+
+def prepare_clip(filename, path="", resolution=None, convert=True, resize=True, audio=True,
+                 ffmpeg_binary="ffmpeg", ffprobe_binary="ffprobe", threads=0, progress=None):
+    """
+    plan and build the artifacts of a clip, blocking
+    :return: plan dictionary
+    """
+    plan = plan_clip(filename, path, resolution, convert, resize, audio, ffprobe_binary)
+    run_plan(plan, ffmpeg_binary, threads, progress)
+    probe(plan["VIDEO"], ffprobe_binary)  # warm the probe cache for the playable file
+    return plan
+
+
+class PreparationJob(object):
+    """
+    Job class exposes the future and progress of one clip
+    """
+
+    def __init__(self, filename):
+        """
+        constructor -> setting default args
+        :param filename: source filename
+        """
+        self.filename = filename  # assign filename
+        self.future = None  # set by the pipeline
+        self._progress = 0.0
+        self._lock = threading.Lock()
+
+    def _set_progress(self, value):
+        with self._lock:
+            self._progress = value
+
+    @property
+    def progress(self):
+        """
+        returns progress between 0 and 1
+        :return: float
+        """
+        with self._lock:
+            return self._progress
+
+    def done(self):
+        """
+        returns true once the clip is prepared or failed
+        :return: boolean
+        """
+        return self.future.done()
+
+    def result(self, timeout=None):
+        """
+        wait for the clip
+        :param timeout: seconds or None
+        :return: plan dictionary, raises if preparation failed
+        """
+        return self.future.result(timeout)
+
+
+class PreparationPipeline(object):
+    """
+    Pipeline class prepares many clips concurrently.
+    Every job drives its own ffmpeg process, so a thread pool is enough to keep all cores busy.
+    """
+
+    def __init__(self, workers=None, ffmpeg_binary="ffmpeg", ffprobe_binary="ffprobe", threads=0):
+        """
+        constructor -> create the pool
+        :param workers: concurrent clips, defaults to the cpu count
+        :param ffmpeg_binary: ffmpeg executable
+        :param ffprobe_binary: ffprobe executable
+        :param threads: ffmpeg -threads value per job
+        """
+        self._workers = workers or os.cpu_count() or 1
+        self._ffmpeg_binary = ffmpeg_binary
+        self._ffprobe_binary = ffprobe_binary
+        self._threads = threads
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=self._workers)
+
+    def submit(self, filename, path="", resolution=None, convert=True, resize=True, audio=False):
+        """
+        queue a clip for preparation, the wave file is only extracted when audio is set
+        since streaming players decode audio straight from the source
+        :return: PreparationJob
+        """
+        job = PreparationJob(filename)
+        job.future = self._executor.submit(
+            prepare_clip, filename, path, resolution, convert, resize, audio,
+            self._ffmpeg_binary, self._ffprobe_binary, self._threads, job._set_progress
+        )
+        return job
+
+    def preload(self, clips):
+        """
+        queue a whole playlist
+        :param clips: iterable of (filename, path) or (filename, path, resolution)
+        :return: list of PreparationJob
+        """
+        return [self.submit(*clip) for clip in clips]
+
+    @staticmethod
+    def progress(jobs):
+        """
+        combined progress of many jobs
+        :param jobs: list of PreparationJob
+        :return: float between 0 and 1
+        """
+        return sum(job.progress for job in jobs) / len(jobs) if jobs else 1.0
+
+    def shutdown(self, wait=True):
+        """
+        stop accepting jobs
+        :param wait: boolean if running jobs should be awaited
+        :return: None
+        """
+        self._executor.shutdown(wait=wait)
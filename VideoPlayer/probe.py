@@ -0,0 +1,147 @@
+"""
+ffprobe wrapper -> one json ffprobe call per file, cached on disk keyed by path, size and mtime
+"""
+import json  # json module -> for ffprobe output and the cache file
+import os  # os module -> for path and file checking
+import subprocess  # subprocess module -> for ffprobe communication
+import threading  # threading module -> cache is shared between players
+
+CACHE_FILE = os.path.join("resources", "probe_cache.json")  # default cache location
+
+_caches = {}  # cache file -> {absolute video path: entry}
+_lock = threading.Lock()
+
+
+def _load(cache_file):
+    """
+    read a cache file once per process
+    :param cache_file: json cache path
+    :return: dictionary
+    """
+    if cache_file not in _caches:
+        try:
+            with open(cache_file, "r") as cache:
+                _caches[cache_file] = json.load(cache)
+        except (OSError, ValueError):
+            _caches[cache_file] = {}  # missing or unreadable cache -> start empty
+
+    return _caches[cache_file]
+
+
+def _save(cache_file):
+    """
+    write a cache file atomically
+    :param cache_file: json cache path
+    :return: None
+    """
+    directory = os.path.dirname(cache_file)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    temporary_file = "%s.%d.tmp" % (cache_file, os.getpid())
+    with open(temporary_file, "w") as cache:
+        json.dump(_caches[cache_file], cache)
+    os.replace(temporary_file, cache_file)
+
+
+def _fraction(value):
+    """
+    parse an ffprobe rational like 30000/1001
+    :param value: string
+    :return: float or None
+    """
+    if not value or value == "0/0":
+        return None
+
+    numerator, _, denominator = value.partition("/")
+    return float(numerator) / float(denominator or 1)
+
+
+def _rotation(stream):
+    """
+    get display rotation from the stream tags or side data
+    :param stream: ffprobe stream dictionary
+    :return: int degrees
+    """
+    if "rotate" in stream.get("tags", {}):
+        return int(stream["tags"]["rotate"])
+
+    for side_data in stream.get("side_data_list", []):
+        if "rotation" in side_data:
+            return int(side_data["rotation"])
+
+    return 0
+
+
+def _run_ffprobe(video_file, ffprobe_binary):
+    """
+    probe format and streams in a single call
+    :param video_file: video path
+    :param ffprobe_binary: ffprobe executable
+    :return: data dictionary
+    """
+    command = [
+        ffprobe_binary,
+        '-v', 'error',
+        '-print_format', 'json',
+        '-show_format', '-show_streams',
+        video_file
+    ]
+
+    output = json.loads(subprocess.check_output(command).decode("utf-8"))
+    streams = output.get("streams", [])
+    video = next((stream for stream in streams if stream.get("codec_type") == "video"), None)
+    audio = next((stream for stream in streams if stream.get("codec_type") == "audio"), None)
+
+    if video is None:
+        raise ValueError("No video stream found > ", video_file)
+
+    fps = _fraction(video.get("avg_frame_rate")) or _fraction(video.get("r_frame_rate"))
+    duration = float(video.get("duration") or output.get("format", {}).get("duration") or 0)
+
+    if video.get("nb_frames"):
+        frames = int(video["nb_frames"])
+    else:
+        frames = int(round(duration * fps))  # container does not store a frame count
+
+    return {
+        "FPS": fps,
+        "RESOLUTION": [int(video["width"]), int(video["height"])],
+        "FRAMES": frames,
+        "DURATION": duration,
+        "PIX_FMT": video.get("pix_fmt"),
+        "ROTATION": _rotation(video),
+        "TIME_BASE": video.get("time_base"),
+        "AUDIO": None if audio is None else {
+            "CODEC": audio.get("codec_name"),
+            "SAMPLE_RATE": int(audio.get("sample_rate", 0)),
+            "CHANNELS": int(audio.get("channels", 0)),
+            "TIME_BASE": audio.get("time_base"),
+        },
+    }
+
+
+def probe(video_file, ffprobe_binary="ffprobe", cache_file=CACHE_FILE):
+    """
+    get video metadata, only spawns ffprobe when the file is new or changed
+    :param video_file: video path
+    :param ffprobe_binary: ffprobe executable
+    :param cache_file: json cache path
+    :return: data dictionary (FPS, RESOLUTION, FRAMES, DURATION, PIX_FMT, ROTATION, TIME_BASE, AUDIO)
+    """
+    key = os.path.abspath(video_file)
+    stat = os.stat(key)
+    signature = [stat.st_size, stat.st_mtime]
+
+    with _lock:
+        entry = _load(cache_file).get(key)
+        if entry is not None and entry["SIGNATURE"] == signature:
+            return dict(entry["DATA"])
+
+    data = _run_ffprobe(video_file, ffprobe_binary)
+
+    with _lock:
+        _load(cache_file)[key] = {"SIGNATURE": signature, "DATA": data}
+        _save(cache_file)
+
+    return dict(data)
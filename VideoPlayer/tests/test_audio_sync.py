@@ -0,0 +1,219 @@
+"""
+audio video sync tests -> StreamingAudioAdapter and MasterClock against a fake mixer that plays in real time,
+no audio device needed
+usage: python -m unittest discover -s tests (from the VideoPlayer directory)
+"""
+import os
+import struct
+import sys
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+from videoplayer import MasterClock, MemoryReader, StreamingAudioAdapter
+
+RATE = 44100  # pcm frames per second
+FRAME_SIZE = 4  # s16 stereo
+
+
+class FakeSound(object):
+    """
+    Sound holding the raw chunk, its length follows the pcm frame count
+    """
+
+    def __init__(self, buffer):
+        self.raw = bytes(buffer)
+        self.length = len(self.raw) / float(FRAME_SIZE * RATE)
+
+
+class FakeChannel(object):
+    """
+    Channel playing one sound and one queued sound on the wall clock, like SDL mixer does
+    """
+
+    def __init__(self):
+        self._sounds = []  # playing, queued
+        self._started = 0  # perf_counter time the playing sound started
+        self._paused_at = None
+
+    def _advance(self):
+        now = self._paused_at if self._paused_at is not None else time.perf_counter()
+        while self._sounds and now - self._started >= self._sounds[0].length:
+            self._started += self._sounds[0].length
+            self._sounds.pop(0)
+
+    def play(self, sound):
+        self._sounds = [sound]
+        self._started = time.perf_counter()
+        self._paused_at = None
+
+    def queue(self, sound):
+        self._advance()
+        if not self._sounds:
+            self.play(sound)
+        else:
+            self._sounds = self._sounds[:1] + [sound]
+
+    def stop(self):
+        self._sounds = []
+
+    def pause(self):
+        if self._paused_at is None:
+            self._paused_at = time.perf_counter()
+
+    def unpause(self):
+        if self._paused_at is not None:
+            self._started += time.perf_counter() - self._paused_at
+            self._paused_at = None
+
+    def set_volume(self, volume):
+        pass
+
+    def get_busy(self):
+        self._advance()
+        return bool(self._sounds)
+
+    def get_sound(self):
+        self._advance()
+        return self._sounds[0] if self._sounds else None
+
+    def get_queue(self):
+        self._advance()
+        return self._sounds[1] if len(self._sounds) > 1 else None
+
+    def heard(self):
+        """
+        pcm frame of the numbered pcm the listener hears right now
+        :return: int, None if the channel is silent
+        """
+        self._advance()
+        if not self._sounds:
+            return None
+        now = self._paused_at if self._paused_at is not None else time.perf_counter()
+        return struct.unpack_from("<I", self._sounds[0].raw)[0] + int((now - self._started) * RATE)
+
+
+class FakeMixer(object):
+    """
+    Stands in for pygame.mixer
+    """
+
+    def __init__(self):
+        self.channels = [FakeChannel() for _ in range(8)]
+
+    def Sound(self, buffer):
+        return FakeSound(buffer)
+
+    def Channel(self, index):
+        return self.channels[index]
+
+    def find_channel(self, force=False):
+        for channel in self.channels:
+            if not channel.get_busy():
+                return channel
+        return self.channels[0] if force else None
+
+    def get_num_channels(self):
+        return len(self.channels)
+
+    def set_num_channels(self, count):
+        self.channels.extend(FakeChannel() for _ in range(count - len(self.channels)))
+
+    def heard(self):
+        """
+        pcm frame heard on the busy channel
+        :return: int, None if every channel is silent
+        """
+        for channel in self.channels:
+            if channel.get_busy():
+                return channel.heard()
+        return None
+
+
+def numbered_pcm(seconds):
+    """
+    pcm frames that carry their own index, so the fake channel can tell which sample is heard
+    :return: bytes
+    """
+    return b"".join(struct.pack("<I", index) for index in range(int(seconds * RATE)))
+
+
+class SlowReader(MemoryReader):
+    """
+    MemoryReader that takes as long to seek as spawning a decoder process does
+    """
+    SEEK_SECONDS = 0.2
+
+    def seek(self, frame):
+        time.sleep(self.SEEK_SECONDS)
+        MemoryReader.seek(self, frame)
+
+
+class AudioSyncTest(unittest.TestCase):
+
+    def setUp(self):
+        self.mixer = FakeMixer()
+        patcher = mock.patch.object(pygame, "mixer", self.mixer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.audio = StreamingAudioAdapter(MemoryReader(numbered_pcm(20), RATE, 2, 2))
+        self.addCleanup(self.audio.close)
+
+    def test_steady_playback_never_resyncs(self):
+        # start at different phases of the pump poll, chunk boundaries must not stall the audio position
+        for phase in (0.0, 0.02, 0.045):
+            self.audio.set_pos(0)
+            time.sleep(phase)
+            clock = MasterClock(self.audio, 0.04)
+            self.audio.play()
+            clock.start()
+            deadline = time.perf_counter() + 1.5
+            while time.perf_counter() < deadline:
+                clock.time()
+                time.sleep(0.004)
+            self.audio.stop()
+            self.assertEqual(clock.resyncs, 0, "phase %.3f drift %s" % (phase, clock.stats))
+
+    def test_start_never_waits_for_the_reader(self):
+        audio = StreamingAudioAdapter(SlowReader(numbered_pcm(5), RATE, 2, 2))
+        self.addCleanup(audio.close)
+        audio.play()
+        for call in (lambda: audio.set_pos(1), audio.pause, audio.unpause, lambda: audio.set_pos(2), audio.stop):
+            began = time.perf_counter()
+            call()
+            self.assertLess(time.perf_counter() - began, SlowReader.SEEK_SECONDS / 4)
+
+        audio.set_pos(3)
+        audio.play()
+        self.assertEqual(audio.get_pos(), 3)  # held at the start until the first chunk plays
+        time.sleep(SlowReader.SEEK_SECONDS + 0.1)
+        self.assertGreater(audio.get_pos(), 3)
+
+    def test_seek_lands_within_one_video_frame(self):
+        # mirrors VideoPlayer.set_frame, the heard sample must match the clock that picks the shown frame
+        fps = 30.0
+        clock = MasterClock(self.audio, 0.04)
+        self.audio.play()
+        clock.start()
+        time.sleep(0.3)
+        for frame in (90, 451, 15, 540, 299):
+            self.audio.set_pos(frame / fps)
+            clock.seek(frame / fps)
+            deadline = time.perf_counter() + 0.1
+            while time.perf_counter() < deadline:
+                clock.time()  # the game loop keeps asking for the frame to show
+                time.sleep(0.004)
+
+            position = clock.time()
+            heard = self.mixer.heard() / float(RATE)
+            self.assertLessEqual(abs(heard - position), 1 / fps, "frame %d clock %.4f heard %.4f" % (
+                frame, position, heard))
+            self.assertLessEqual(abs(heard - self.audio.get_pos()), 1 / fps)
+            self.assertLessEqual(abs(position - frame / fps - 0.1), 1 / fps)  # the shown frame follows the seek
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,186 @@
+"""
+thumbnail atlas -> evenly spaced or keyframe thumbnails extracted in one ffmpeg pass and tiled into a single image,
+cached with a json index next to the other clip resources so scrubbing is a sub rect blit without decoding
+"""
+import bisect  # bisect module -> for time lookup
+import json  # json module -> for the atlas index
+import math  # math module -> for the grid size
+import os  # os module -> for path and file checking
+import subprocess  # subprocess module -> for ffmpeg communication
+
+import pygame  # pygame module -> for the atlas surface
+
+from prepare import PARTIAL_PREFIX  # outputs are renamed once ffmpeg succeeded
+from probe import probe  # cached ffprobe metadata
+
+EVEN = "even"  # thumbnails at evenly spaced times
+KEYFRAMES = "keyframes"  # thumbnails at evenly chosen keyframes, only keyframes are decoded
+
+
+def atlas_files(destination, name, count, size, mode):
+    """
+    get the atlas image and index paths, one pair per parameter set
+    :return: (image path, index path)
+    """
+    stem = os.path.join(destination, "THUMBS_%s_%d_%dx%d_%s" % (name, count, size[0], size[1], mode))
+    return stem + ".png", stem + ".json"
+
+
+def _signature(video_file):
+    stat = os.stat(video_file)
+    return [stat.st_size, stat.st_mtime]
+
+
+def build(video_file, image_file, index_file, count=32, size=(160, 90), mode=EVEN, keyframe_times=None,
+          ffmpeg_binary="ffmpeg", ffprobe_binary="ffprobe"):
+    """
+    extract and tile thumbnails with a single ffmpeg invocation
+    :param video_file: source video
+    :param image_file: atlas png path
+    :param index_file: json index path
+    :param count: number of thumbnails
+    :param size: (int w, int h) of one thumbnail
+    :param mode: EVEN or KEYFRAMES
+    :param keyframe_times: sorted keyframe times in seconds, required for KEYFRAMES
+    :param ffmpeg_binary: ffmpeg executable
+    :param ffprobe_binary: ffprobe executable
+    :return: index dictionary
+    """
+    data = probe(video_file, ffprobe_binary)
+    duration = data["DURATION"] or data["FRAMES"] / data["FPS"]
+
+    if mode == KEYFRAMES:
+        if not keyframe_times:
+            raise ValueError("Keyframe thumbnails need keyframe times > ", video_file)
+        step = max(int(math.ceil(len(keyframe_times) / float(count))), 1)
+        times = keyframe_times[::step][:count]
+        seek = ['-skip_frame', 'nokey']  # the decoder drops every other frame before decoding it
+        video_filter = "select='not(mod(n\\,%d))'" % step
+    else:
+        times = [duration * index / count for index in range(count)]
+        seek = []
+        video_filter = "fps=%d/%.6f" % (count, duration)
+
+    columns = int(math.ceil(math.sqrt(len(times))))
+    rows = int(math.ceil(len(times) / float(columns)))
+    video_filter += ",scale=%d:%d,tile=%dx%d" % (size[0], size[1], columns, rows)
+
+    directory, name = os.path.split(image_file)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory, exist_ok=True)
+    partial_file = os.path.join(directory, PARTIAL_PREFIX + name)
+
+    command = [
+        ffmpeg_binary,
+        '-nostdin', '-y',
+        '-loglevel', 'error'
+    ] + seek + [
+        '-i', video_file,
+        '-an',
+        '-vf', video_filter,
+        '-vsync', '0',
+        '-frames:v', '1',
+        partial_file
+    ]
+    subprocess.check_call(command, stderr=subprocess.DEVNULL)
+    os.replace(partial_file, image_file)
+
+    index = {
+        "SIGNATURE": _signature(video_file),
+        "MODE": mode,
+        "SIZE": list(size),
+        "COLUMNS": columns,
+        "ROWS": rows,
+        "TIMES": times,
+        "FRAMES": [int(round(seconds * data["FPS"])) for seconds in times],
+    }
+    with open(index_file, "w") as cache:
+        json.dump(index, cache)
+    return index
+
+
+def load(video_file, destination, count=32, size=(160, 90), mode=EVEN, keyframe_times=None,
+         ffmpeg_binary="ffmpeg", ffprobe_binary="ffprobe"):
+    """
+    get the atlas of a clip, it is only built when missing or older than the video
+    :param video_file: source video
+    :param destination: resource folder of the clip
+    :return: ThumbnailAtlas
+    """
+    name = os.path.basename(video_file)
+    image_file, index_file = atlas_files(destination, name, count, size, mode)
+
+    index = None
+    if os.path.isfile(image_file) and os.path.isfile(index_file):
+        try:
+            with open(index_file, "r") as cache:
+                index = json.load(cache)
+        except (OSError, ValueError):
+            index = None  # unreadable index -> rebuild
+        if index is not None and index.get("SIGNATURE") != _signature(video_file):
+            index = None
+
+    if index is None:
+        print("[INFO] Building thumbnails > ", video_file)
+        index = build(video_file, image_file, index_file, count, size, mode, keyframe_times,
+                      ffmpeg_binary, ffprobe_binary)
+
+    return ThumbnailAtlas(pygame.image.load(image_file), index)
+
+
+class ThumbnailAtlas(object):
+    """
+    Atlas class maps times to tiles of one surface, every thumbnail blit is a sub rect of it
+    """
+
+    def __init__(self, surface, index):
+        """
+        constructor -> setting default args
+        :param surface: pygame Surface of the tiled thumbnails
+        :param index: index dictionary from build
+        """
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert()  # display format, blits need no conversion
+        self.surface = surface  # assign atlas
+        self.size = tuple(index["SIZE"])  # size of one thumbnail
+        self.times = index["TIMES"]  # seconds of every thumbnail
+        self.frames = index["FRAMES"]  # frame numbers of every thumbnail
+        self._columns = index["COLUMNS"]
+
+    def __len__(self):
+        return len(self.times)
+
+    def rect(self, index):
+        """
+        get the area of a thumbnail inside the atlas
+        :param index: thumbnail index
+        :return: pygame Rect
+        """
+        row, column = divmod(index, self._columns)
+        return pygame.Rect(column * self.size[0], row * self.size[1], self.size[0], self.size[1])
+
+    def nearest(self, seconds):
+        """
+        get the last thumbnail at or before a time
+        :param seconds: playback position
+        :return: thumbnail index
+        """
+        return max(bisect.bisect_right(self.times, seconds) - 1, 0)
+
+    def thumbnail(self, index):
+        """
+        get a thumbnail sharing the atlas pixels
+        :param index: thumbnail index
+        :return: pygame Surface
+        """
+        return self.surface.subsurface(self.rect(index))
+
+    def blit(self, surface, position, seconds):
+        """
+        draw the thumbnail for a time, no decoding involved
+        :param surface: target pygame Surface
+        :param position: x y on the target
+        :param seconds: playback position
+        :return: pygame Rect
+        """
+        return surface.blit(self.surface, position, self.rect(self.nearest(seconds)))
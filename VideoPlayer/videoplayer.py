@@ -1,10 +1,24 @@
+import bisect  # bisect module -> for keyframe lookup
+import collections  # collections module -> for bounded statistics
+import json  # json module -> for the keyframe index cache
 import os  # os module -> for path and file checking
+import queue  # queue module -> for the bounded frame prefetch queue
 import subprocess  # subprocess module -> for ffmpeg communication
+import threading  # threading module -> for the background decoder
+import time  # time module -> for seek latency measurement
 import wave  # wave module -> for wave file processing
+import weakref  # weakref module -> for unregistering dropped players
 
 import pygame  # pygame module -> for frame displaying
 import platform  # get os running on
 
+import decodeconfig  # adaptive ffmpeg threads and segment plans
+import framecache  # memory mapped raw frames
+import instrumentation  # opt-in stage timers and counters
+import thumbnails  # cached thumbnail atlas
+from prepare import PreparationPipeline, plan_clip, run_plan  # asset preparation
+from probe import probe  # cached ffprobe metadata
+
 pygame.mixer.pre_init(frequency=44100, size=-16, channels=2)  # pre init pygame mixer module
 
 if int(pygame.__version__.split(".")[0]) > 2:
@@ -55,50 +69,455 @@ class GUIAdapter(object):
         ))  # set position to center
 
 
-class AudioAdapter(object):
+class WaveReader(object):
     """
-    Audio class wraps wave access and positioning
+    Reader class reads fixed size chunks of pcm frames from a wave file
     """
 
-    def __init__(self, filename, path):
+    def __init__(self, filename):
         """
-        constructor -> setting default args
-        :param filename: audio filename
-        :param path: audio path
+        constructor -> open the wave file
+        :param filename: wave file path
         """
-        # private attributes
-        # Audio should only used by VideoPlayer so access is not necessary -> private attr
+        self._audio_file = wave.open(filename, "r")  # open the audio file
+        self.total_frames = self._audio_file.getnframes()  # get total frame count
+        self.frame_rate = self._audio_file.getframerate()  # get audio frame rate
+        self.channels = self._audio_file.getnchannels()  # get channels
+        self.sample_width = self._audio_file.getsampwidth()  # get sample width
 
-        self._filename = filename.split(".")[0] + ".wav"  # set filename
-        self._path = path  # set path
+    def read(self, frames):
+        """
+        read the next chunk
+        :param frames: number of pcm frames
+        :return: bytes, empty at the end of the file
+        """
+        return self._audio_file.readframes(frames)
 
-        self._audio_file = wave.open(os.path.join(self._path, self._filename), "r")  # open the audio file
-        self._audio_total_frames = self._audio_file.getnframes()  # get total frame count
-        self._audio_frame_rate = self._audio_file.getframerate()  # get audio frame rate
-        self._audio_channels = self._audio_file.getnchannels()  # get channels
-        self._audio_sample_width = self._audio_file.getsampwidth()  # get sample width
-        self._audio_raw_array = self._audio_file.readframes(self._audio_total_frames)  # read all frames into buffer
-        self._audio_sound_array = pygame.sndarray.array(self._audio_raw_array)  # create sound array buffer
-        self._audio_sound = pygame.mixer.Sound(self._audio_sound_array)  # initialize sound
+    def seek(self, frame):
+        """
+        reposition the reader
+        :param frame: pcm frame index
+        :return: None
+        """
+        self._audio_file.setpos(min(max(frame, 0), self.total_frames))
 
+    def close(self):
+        """
+        close the wave file
+        :return: None
+        """
+        self._audio_file.close()
+
+
+class FFmpegAudioReader(object):
+    """
+    Reader class decodes pcm frames straight from ffmpeg stdout, no intermediate file is written
+    """
+
+    def __init__(self, filename, ffmpeg_binary, duration, frame_rate=44100, channels=2):
+        """
+        constructor -> setting default args, the process is spawned on the first read
+        :param filename: media file with an audio stream
+        :param ffmpeg_binary: ffmpeg executable
+        :param duration: media duration in seconds
+        :param frame_rate: output sample rate
+        :param channels: output channels
+        """
+        self._filename = filename  # assign filename
+        self._ffmpeg_binary = ffmpeg_binary  # assign ffmpeg
+        self.frame_rate = frame_rate
+        self.channels = channels
+        self.sample_width = 2  # s16le
+        self.total_frames = int(duration * frame_rate)
+        self._start_frame = 0  # frame the next process starts at
+        self._process = None  # decoding process
+
+    def _open(self):
+        """
+        spawn ffmpeg at the start frame
+        :return: popen object
+        """
+        command = [
+            self._ffmpeg_binary,
+            '-nostdin', '-loglevel', 'fatal',
+            '-ss', '%.6f' % (self._start_frame / self.frame_rate),
+            '-i', self._filename,
+            '-vn',
+            '-f', 's16le', '-acodec', 'pcm_s16le',
+            '-ar', str(self.frame_rate),
+            '-ac', str(self.channels), '-'
+        ]
+
+        return subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+
+    def read(self, frames):
+        """
+        read the next chunk
+        :param frames: number of pcm frames
+        :return: bytes, empty at the end of the stream
+        """
+        if self._process is None:
+            self._process = self._open()
+        return self._process.stdout.read(frames * self.channels * self.sample_width)
+
+    def seek(self, frame):
+        """
+        reposition the reader, the next read starts a new process
+        :param frame: pcm frame index
+        :return: None
+        """
+        self.close()
+        self._start_frame = min(max(frame, 0), self.total_frames)
+
+    def close(self):
+        """
+        stop the decoding process
+        :return: None
+        """
+        if self._process is not None:
+            self._process.kill()
+            self._process.wait()
+            self._process = None
+
+
+class StreamingAudioAdapter(object):
+    """
+    Audio class streaming fixed size chunks onto a mixer channel.
+    Memory stays constant whatever the audio length and seeking only repositions the reader.
+    """
+    CHUNK_SECONDS = 0.25  # length of one queued buffer
+
+    def __init__(self, reader):
+        """
+        constructor -> start the pump thread
+        :param reader: chunk reader (WaveReader or FFmpegAudioReader)
+        """
+        self._reader = reader  # assign reader
+        self._audio_frame_rate = reader.frame_rate  # get audio frame rate
+        self._audio_total_frames = reader.total_frames  # get total frame count
+        self._chunk_frames = int(reader.frame_rate * self.CHUNK_SECONDS)  # pcm frames per chunk
+        self._frame_size = reader.channels * reader.sample_width  # bytes per pcm frame
+        self._read_position = 0  # pcm frame the reader is at
+        self._loop_frames = None  # loop length in pcm frames, None plays once
+        self._primed = None  # (position, sounds, reader position after them) read ahead by prime
+        self._start_request = None  # position the pump starts playing at, None if there is no request
+        self._generation = 0  # counts starts and stops, chunks read for an older one are dropped
+
+        self._audio_channel = None  # mixer channel the chunks are queued on
+        self._sounds = (None, None)  # playing and queued chunk, tells our channel from a taken one
+        self._audio_volume = 1.0  # channel volume
         self._audio_is_playing = False  # boolean to control audio playback
+        self._audio_is_paused = False  # boolean set while the channel is paused
         self._audio_is_muted = False
+        self._audio_exhausted = False  # boolean set once the reader returned everything
+
+        # playback position
+        self._audio_offset = 0  # seconds into the file where playback (re)started
+        self._audio_paused_at = 0  # perf_counter time of the last pause
+        # (pcm frames the mixer finished since the start, perf_counter time the playing chunk started,
+        #  pcm frames of the playing chunk, pcm frames of the chunk queued behind it or 0),
+        # replaced as a whole so readers never see a torn update
+        self._chunk_anchor = (0, 0, 0, 0)
+
+        self.instrumentation = None  # Instrumentation or None
+        self._lock = threading.RLock()  # playback state, shared between the caller and the pump
+        self._reader_lock = threading.Lock()  # reader position, held while reading instead of the state lock
+        self._running = True  # boolean to stop the pump
+        self._wake = threading.Event()  # set on a start request so the pump does not finish its poll first
+        self._thread = threading.Thread(target=self._pump, daemon=True)
+        self._thread.start()
+
+    def _next_sound(self):
+        """
+        read the next chunk into a sound, wrapping around without a gap while looping, call under the reader lock
+        :return: (pygame Sound, pcm frames) or None at the end
+        """
+        if not self._running:
+            return None  # closed, a read would respawn the reader
+        frames = self._chunk_frames
+        loop_frames = self._loop_frames
+        if loop_frames is not None:
+            if self._read_position >= loop_frames:
+                self._reader.seek(0)  # next pass, queued right behind the last chunk
+                self._read_position = 0
+            frames = min(frames, loop_frames - self._read_position)
+
+        chunk = self._reader.read(frames)
+        if loop_frames is not None and len(chunk) < frames * self._frame_size:
+            chunk = bytes(chunk) + bytes(frames * self._frame_size - len(chunk))  # pad to the video length
+        if not chunk:
+            return None
+
+        frames = len(chunk) // self._frame_size
+        self._read_position += frames
+        return pygame.mixer.Sound(buffer=chunk), frames
+
+    def _seek(self, position):
+        """
+        reposition the reader, call under the reader lock
+        :param position: seconds, wrapped into the loop while looping
+        :return: None
+        """
+        frame = int(round(position * self._audio_frame_rate))  # sample accurate, frame aligned
+        if self._loop_frames is not None:
+            frame %= self._loop_frames
+        self._reader.seek(frame)
+        self._read_position = frame
+
+    def _read_start(self, position):
+        """
+        get the first two chunks at a position, taken from prime if it read them and the reader is still behind them
+        :param position: seconds
+        :return: list of two (pygame Sound, pcm frames) or None
+        """
+        with self._lock:
+            primed, self._primed = self._primed, None
+        with self._reader_lock:
+            if primed is not None and primed[0] == position and primed[2] == self._read_position:
+                return primed[1]
+            self._seek(position)  # restarts the reader process, kept off the caller thread
+            return [self._next_sound(), self._next_sound()]
+
+    def _pump(self):
+        """
+        start playback on request and keep one chunk queued behind the playing one,
+        reads happen outside the state lock so the caller never waits on the reader
+        :return: None
+        """
+        while self._running:
+            self._wake.clear()  # cleared before the state is read, a request made after it wakes the next wait
+            begin = refill = None
+            with self._lock:
+                if self._audio_is_playing and not self._audio_is_paused:
+                    if self._start_request is None and self._audio_channel is not None:
+                        if self._owned_channel() is None:
+                            # another sound took the channel, continue on a free one
+                            self._audio_channel = None
+                            if not self._audio_exhausted:
+                                position = self.get_pos()
+                                self._start(position if position is not None else self._audio_offset)
+                        elif not self._audio_channel.get_busy() and not self._audio_exhausted:
+                            # underrun: the channel ran dry, restart and re-anchor the position
+                            if self.instrumentation is not None:
+                                self.instrumentation.count(instrumentation.AUDIO_UNDERRUNS)
+                            position = self.get_pos()
+                            self._start(position if position is not None else self._audio_offset)
+                        elif self._audio_channel.get_queue() is None:
+                            played, started, frames, queued = self._chunk_anchor
+                            if queued:
+                                # the queued chunk started, every sample of the one before was consumed
+                                started = min(time.perf_counter(), started + frames / self._audio_frame_rate)
+                                self._chunk_anchor = (played + frames, started, queued, 0)
+                                self._sounds = (self._sounds[1], None)
+                            if not self._audio_exhausted:
+                                refill = self._generation
+                    if self._start_request is not None:
+                        begin = (self._start_request, self._generation)
+                        self._start_request = None
+
+            if begin is not None:
+                self._begin(*begin)
+                continue
+            if refill is not None:
+                self._refill(refill)
+            self._wake.wait(self.CHUNK_SECONDS / 4)
+
+    def _refill(self, generation):
+        """
+        read the next chunk and queue it behind the playing one
+        :param generation: start generation the chunk belongs to, a later start discards it
+        :return: None
+        """
+        with self._reader_lock:
+            chunk = self._next_sound()
+        with self._lock:
+            channel = self._owned_channel()
+            if generation != self._generation or not self._audio_is_playing or channel is None:
+                return  # restarted meanwhile, the next start seeks the reader again
+            if chunk is None:
+                self._audio_exhausted = True
+                return
+            channel.queue(chunk[0])
+            self._sounds = (self._sounds[0], chunk[0])
+            self._chunk_anchor = self._chunk_anchor[:3] + (chunk[1],)
+
+    def _begin(self, position, generation):
+        """
+        read the first chunks of a start request and play them
+        :param position: seconds
+        :param generation: start generation of the request, a later start or stop discards it
+        :return: None
+        """
+        sounds = self._read_start(position)
+        with self._lock:
+            if generation != self._generation or not self._audio_is_playing:
+                return  # superseded while reading
+            if self._audio_is_paused:
+                # paused while reading, keep the chunks for the unpause
+                self._primed = (position, sounds, self._read_position)
+                self._start_request = position
+                return
+
+            self._chunk_anchor = (0, time.perf_counter(), 0, 0)
+            if sounds[0] is None:
+                self._audio_exhausted = True
+                return  # nothing left to play
+            channel = self._owned_channel()
+            self._audio_channel = channel if channel is not None else self._free_channel()
+            self._audio_channel.set_volume(self._audio_volume)
+            self._audio_channel.play(sounds[0][0])
+            self._chunk_anchor = (0, time.perf_counter(), sounds[0][1], 0)
+            self._sounds = (sounds[0][0], None)
+
+            if sounds[1] is not None:
+                self._audio_channel.queue(sounds[1][0])
+                self._chunk_anchor = self._chunk_anchor[:3] + (sounds[1][1],)
+                self._sounds = (sounds[0][0], sounds[1][0])
+
+    def _start(self, position):
+        """
+        request playback at a position, the pump seeks the reader and plays the first chunks
+        :param position: seconds
+        :return: None
+        """
+        channel = self._owned_channel()
+        if channel is not None:
+            channel.stop()
+        self._generation += 1  # chunks read for an earlier start are dropped
+        self._start_request = position
+        self._audio_offset = position
+        self._chunk_anchor = (0, time.perf_counter(), 0, 0)  # get_pos holds at the position until the chunks play
+        self._sounds = (None, None)
+        self._audio_exhausted = False
+        self._wake.set()
+
+    @staticmethod
+    def _free_channel():
+        """
+        get an idle mixer channel, the mixer grows instead of stealing a channel from another clip
+        :return: pygame Channel
+        """
+        channel = pygame.mixer.find_channel()
+        if channel is None:
+            count = pygame.mixer.get_num_channels()
+            pygame.mixer.set_num_channels(count + 1)
+            channel = pygame.mixer.Channel(count)
+        return channel
+
+    def _owned_channel(self):
+        """
+        get the mixer channel if it still plays chunks of this adapter
+        :return: pygame Channel, or None if there is none or another sound took it
+        """
+        channel = self._audio_channel
+        if channel is None:
+            return None
+        sound = channel.get_sound()
+        if sound is not None and sound is not self._sounds[0] and sound is not self._sounds[1]:
+            return None
+        return channel
+
+    def prime(self):
+        """
+        read the first chunks ahead so play starts without waiting for the reader
+        :return: None
+        """
+        with self._lock:
+            if self._audio_is_playing or self._primed is not None:
+                return
+            position = self._audio_offset
+        with self._reader_lock:
+            self._seek(position)
+            primed = (position, [self._next_sound(), self._next_sound()], self._read_position)
+        with self._lock:
+            self._primed = primed
+
+    def set_loop(self, seconds):
+        """
+        loop the audio with a fixed length, shorter audio is padded with silence so every pass matches the video
+        :param seconds: loop length, None plays once
+        :return: None
+        """
+        with self._lock:
+            self._loop_frames = None if seconds is None else max(int(round(seconds * self._audio_frame_rate)), 1)
+            self._primed = None
 
     def play(self):
         """
         start Audio playback
         :return: None
         """
-        self._audio_sound.play()
-        self._audio_is_playing = True
+        with self._lock:
+            self._start(self._audio_offset)
+            self._audio_is_playing = True
+            self._audio_is_paused = False
 
     def stop(self):
         """
         stop audio playback
         :return: None
         """
-        self._audio_sound.stop()
-        self._audio_is_playing = False
+        with self._lock:
+            position = self.get_pos()
+            if position is not None:
+                self._audio_offset = position  # the next play continues here
+            channel = self._owned_channel()
+            if channel is not None:
+                channel.stop()
+            self._generation += 1  # a start still being read is dropped
+            self._start_request = None
+            self._audio_is_playing = False
+            self._audio_is_paused = False
+
+    def pause(self):
+        """
+        pause audio playback, keeps the position
+        :return: None
+        """
+        with self._lock:
+            channel = self._owned_channel()
+            if channel is not None:
+                channel.pause()
+            if not self._audio_is_paused:
+                self._audio_paused_at = time.perf_counter()
+            self._audio_is_paused = True
+
+    def unpause(self):
+        """
+        resume paused audio playback
+        :return: None
+        """
+        with self._lock:
+            channel = self._owned_channel()
+            if self._audio_is_paused and channel is not None:
+                channel.unpause()
+            if self._audio_is_paused:
+                played, started, frames, queued = self._chunk_anchor
+                paused = time.perf_counter() - self._audio_paused_at
+                self._chunk_anchor = (played, started + paused, frames, queued)
+            self._audio_is_paused = False
+
+    def get_pos(self):
+        """
+        get playback position from the samples the mixer consumed, interpolated inside the playing chunk
+        :return: float seconds, or None if the audio is not playing or played to the end
+        """
+        if not self._audio_is_playing:
+            return None
+        channel = self._owned_channel()
+        if self._audio_exhausted and (channel is None or not channel.get_busy()):
+            return None  # every chunk was played
+
+        played, started, frames, queued = self._chunk_anchor
+        if queued and channel is not None and channel.get_queue() is None:
+            # the queued chunk started and the pump has not noticed yet, its poll is slower than the tolerance
+            played, started, frames = played + frames, started + frames / self._audio_frame_rate, queued
+        now = self._audio_paused_at if self._audio_is_paused else time.perf_counter()
+        elapsed = min(max(now - started, 0) * self._audio_frame_rate, frames)  # never past the playing chunk
+        position = self._audio_offset + (played + elapsed) / self._audio_frame_rate
+        if self._loop_frames is not None:
+            return position  # keeps counting across passes
+        return position if position <= self._audio_total_frames / self._audio_frame_rate else None
 
     @property
     def is_playing(self):
@@ -127,21 +546,29 @@ class AudioAdapter(object):
 
     def set_pos(self, index):
         """
-        set position of sound
+        set position of sound, only the reader is repositioned
         :param index: num in seconds
         :return: None
         """
-        index = self._audio_frame_rate * index * self._audio_channels * self._audio_sample_width  # get music index
-        self._audio_sound.stop()  # stop current play back
-        self._audio_sound = pygame.mixer.Sound(pygame.sndarray.array(self._audio_raw_array[index:]))
-        self.play()  # start new music
+        with self._lock:
+            if self._audio_is_playing and not self._audio_is_paused:
+                self._start(index)  # continue playing from the new position
+            else:
+                self._audio_offset = index  # picked up by the next play
+                channel = self._owned_channel()
+                if channel is not None:
+                    channel.stop()
+                self._generation += 1  # a start still being read is dropped
+                self._start_request = None
+                self._audio_is_playing = False
+                self._audio_is_paused = False
 
     def get_volume(self):
         """
         get volume
         :return: float
         """
-        return self._audio_sound.get_volume()
+        return self._audio_volume
 
     def set_volume(self, vol):
         """
@@ -149,7 +576,653 @@ class AudioAdapter(object):
         :param vol: float
         :return: None
         """
-        self._audio_sound.set_volume(vol)
+        self._audio_volume = vol
+        channel = self._owned_channel()
+        if channel is not None:
+            channel.set_volume(vol)
+
+    def close(self):
+        """
+        stop the pump and release the reader
+        :return: None
+        """
+        self.stop()
+        self._running = False
+        self._wake.set()
+        with self._reader_lock:
+            self._reader.close()  # waits for a read in flight, later reads see the pump stopped
+
+
+class MemoryReader(object):
+    """
+    Reader class serves chunks of pcm frames held in memory, seeking is O(1) and never copies
+    """
+
+    def __init__(self, raw_frames, frame_rate, channels, sample_width):
+        """
+        constructor -> setting default args
+        :param raw_frames: bytes of interleaved pcm frames
+        :param frame_rate: sample rate
+        :param channels: channels
+        :param sample_width: bytes per sample
+        """
+        self._raw_frames = memoryview(raw_frames)  # slices share the buffer
+        self.frame_rate = frame_rate
+        self.channels = channels
+        self.sample_width = sample_width
+        self._frame_size = channels * sample_width  # bytes per pcm frame
+        self.total_frames = len(raw_frames) // self._frame_size
+        self._position = 0  # next pcm frame
+
+    def read(self, frames):
+        """
+        read the next chunk
+        :param frames: number of pcm frames
+        :return: memoryview, empty at the end
+        """
+        start = self._position * self._frame_size
+        self._position = min(self._position + frames, self.total_frames)
+        return self._raw_frames[start:self._position * self._frame_size]
+
+    def seek(self, frame):
+        """
+        reposition the reader
+        :param frame: pcm frame index
+        :return: None
+        """
+        self._position = min(max(frame, 0), self.total_frames)
+
+    def close(self):
+        pass
+
+
+class AudioAdapter(StreamingAudioAdapter):
+    """
+    Audio class wraps wave access and positioning, the whole wave file is held in memory.
+    Playback is chunked like StreamingAudioAdapter, so seeking is sample accurate and copies at most one chunk.
+    """
+
+    def __init__(self, filename, path):
+        """
+        constructor -> setting default args
+        :param filename: audio filename
+        :param path: audio path
+        """
+        # private attributes
+        # Audio should only used by VideoPlayer so access is not necessary -> private attr
+
+        self._filename = filename.split(".")[0] + ".wav"  # set filename
+        self._path = path  # set path
+
+        audio_file = wave.open(os.path.join(self._path, self._filename), "r")  # open the audio file
+        raw_frames = audio_file.readframes(audio_file.getnframes())  # read all frames into buffer
+        reader = MemoryReader(raw_frames, audio_file.getframerate(), audio_file.getnchannels(), audio_file.getsampwidth())
+        audio_file.close()
+
+        super(AudioAdapter, self).__init__(reader)
+
+
+class MasterClock(object):
+    """
+    Playback clock, audio is the master when it plays and a monotonic clock fills in otherwise.
+    The clock runs smoothly and is only pulled to the audio position when they drift apart by more than the tolerance.
+    """
+
+    def __init__(self, audio=None, tolerance=0.04):
+        """
+        constructor -> setting default args
+        :param audio: audio adapter with get_pos or None
+        :param tolerance: allowed drift in seconds before resyncing to the audio
+        """
+        self._audio = audio  # master source
+        self._tolerance = tolerance  # assign sync tolerance
+        self._anchor_time = 0  # perf_counter time of the anchor
+        self._anchor_position = 0  # playback position at the anchor
+        self._running = False  # boolean set while the clock advances
+
+        # drift statistics
+        self.resyncs = 0  # jumps to the audio position
+        self._drift = 0  # last measured drift in seconds, positive if video is ahead
+        self._drift_max = 0  # largest absolute drift
+        self._drift_sum = 0  # sum of absolute drift
+        self._drift_samples = 0  # number of drift measurements
+
+    @property
+    def running(self):
+        """
+        returns running state
+        :return: boolean
+        """
+        return self._running
+
+    def start(self):
+        """
+        start advancing from the current position
+        :return: None
+        """
+        if not self._running:
+            self._anchor_time = time.perf_counter()
+            self._running = True
+
+    def pause(self):
+        """
+        stop advancing, keeps the position
+        :return: None
+        """
+        if self._running:
+            self._anchor_position = self._monotonic_position()
+            self._running = False
+
+    def seek(self, position):
+        """
+        jump to a position
+        :param position: seconds
+        :return: None
+        """
+        self._anchor_position = position
+        self._anchor_time = time.perf_counter()
+
+    def _monotonic_position(self):
+        """
+        position advanced by the monotonic clock since the anchor
+        :return: seconds
+        """
+        if not self._running:
+            return self._anchor_position
+        return self._anchor_position + time.perf_counter() - self._anchor_time
+
+    def time(self):
+        """
+        get the playback position, resyncing to the audio when it drifted too far
+        :return: seconds
+        """
+        position = self._monotonic_position()
+
+        audio_position = self._audio.get_pos() if self._audio is not None and self._running else None
+        if audio_position is not None:
+            drift = position - audio_position
+            self._drift = drift
+            self._drift_max = max(self._drift_max, abs(drift))
+            self._drift_sum += abs(drift)
+            self._drift_samples += 1
+
+            if abs(drift) > self._tolerance:
+                self.seek(audio_position)  # video drops or repeats frames to catch the audio
+                self.resyncs += 1
+                position = audio_position
+
+        return position
+
+    @property
+    def stats(self):
+        """
+        returns drift statistics
+        :return: dictionary
+        """
+        return {
+            "DRIFT": self._drift,
+            "MEAN_DRIFT": self._drift_sum / self._drift_samples if self._drift_samples else 0,
+            "MAX_DRIFT": self._drift_max,
+            "RESYNCS": self.resyncs,
+        }
+
+
+class KeyframeIndex(object):
+    """
+    Keyframe index class maps frame numbers to the nearest preceding keyframe.
+    Built once per file with ffprobe and cached as json, invalidated when the file changes.
+    """
+
+    def __init__(self, video_file, cache_file, ffprobe_binary):
+        """
+        constructor -> load the cached index or build it
+        :param video_file: indexed video
+        :param cache_file: json cache path
+        :param ffprobe_binary: ffprobe executable
+        """
+        self._video_file = video_file  # assign video file
+        self._cache_file = cache_file  # assign cache file
+        self._ffprobe_binary = ffprobe_binary  # assign ffprobe
+
+        stat = os.stat(self._video_file)
+        self._signature = [stat.st_size, stat.st_mtime]  # file identity for cache invalidation
+
+        index = self._load()
+        if index is None:
+            index = self._build()
+            self._save(index)
+
+        self.total_frames = index["FRAMES"]  # number of frames in presentation order
+        self._keyframes = [keyframe[0] for keyframe in index["KEYFRAMES"]]  # keyframe frame numbers
+        self._keyframe_times = [keyframe[1] for keyframe in index["KEYFRAMES"]]  # keyframe pts in seconds
+
+    def _load(self):
+        """
+        read the cached index if it matches the video file
+        :return: index dictionary or None
+        """
+        if not os.path.isfile(self._cache_file):
+            return None
+
+        try:
+            with open(self._cache_file, "r") as cache:
+                index = json.load(cache)
+        except (OSError, ValueError):
+            return None  # unreadable cache -> rebuild
+
+        return index if index.get("SIGNATURE") == self._signature else None
+
+    def _save(self, index):
+        """
+        write the index next to the other video resources
+        :param index: index dictionary
+        :return: None
+        """
+        directory = os.path.dirname(self._cache_file)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory, exist_ok=True)  # no other artifact was built for the clip yet
+        with open(self._cache_file, "w") as cache:
+            json.dump(index, cache)
+
+    def _build(self):
+        """
+        probe every video packet once, keyframes are numbered in presentation order
+        :return: index dictionary
+        """
+        command = [
+            self._ffprobe_binary,
+            '-v', 'error', '-select_streams', 'v:0',
+            '-show_entries', 'packet=pts_time,flags',
+            '-of', 'csv=p=0',
+            self._video_file
+        ]
+
+        packets = []
+        for line in subprocess.check_output(command).decode("utf-8").splitlines():
+            fields = line.split(",")
+            if len(fields) < 2 or fields[0] in ("", "N/A"):
+                continue  # packet without timestamp
+            packets.append((float(fields[0]), "K" in fields[1]))
+
+        packets.sort()  # decode order -> presentation order
+        keyframes = [[frame, pts] for frame, (pts, key) in enumerate(packets) if key]
+        if not keyframes or keyframes[0][0] != 0:
+            keyframes.insert(0, [0, packets[0][0] if packets else 0.0])  # always allow decoding from the start
+
+        return {"SIGNATURE": self._signature, "FRAMES": len(packets), "KEYFRAMES": keyframes}
+
+    @property
+    def keyframes(self):
+        """
+        returns keyframe frame numbers in presentation order
+        :return: list of int
+        """
+        return list(self._keyframes)
+
+    @property
+    def keyframe_times(self):
+        """
+        returns keyframe times in seconds
+        :return: list of float
+        """
+        return list(self._keyframe_times)
+
+    def seek_point(self, frame):
+        """
+        get the keyframe to start decoding from
+        :param frame: wanted frame number
+        :return: (keyframe frame number, keyframe time in seconds)
+        """
+        position = max(bisect.bisect_right(self._keyframes, frame) - 1, 0)
+        return self._keyframes[position], self._keyframe_times[position]
+
+
+class SegmentedPipe(object):
+    """
+    Pipe class decodes gop aligned segments with several ffmpeg processes at once and serves
+    their frames in order through the popen interface FrameDecoder reads from.
+    Each running segment buffers a few frames, a new segment is started whenever one is used up.
+    """
+
+    def __init__(self, segments, open_segment, frame_size, processes, buffer_frames=4):
+        """
+        constructor -> start the first processes
+        :param segments: list of (first frame, end frame)
+        :param open_segment: callable(first frame, end frame) returning a popen object
+        :param frame_size: bytes per frame
+        :param processes: segments decoded concurrently
+        :param buffer_frames: frames buffered per running segment
+        """
+        self._segments = collections.deque(segments)  # segments not started yet
+        self._open_segment = open_segment  # assign segment opener
+        self._frame_size = frame_size  # assign frame size
+        self._buffer_frames = buffer_frames  # assign buffer size
+        self._workers = collections.deque()  # (process, frame queue) of running segments in order
+        self._chunk = None  # frame currently read by the consumer
+        self._chunk_offset = 0  # bytes of the chunk already read
+        self._running = True  # boolean to stop the drain threads
+        self.stdout = self  # FrameDecoder reads pipe.stdout.readinto
+
+        for _ in range(max(processes, 1)):
+            self._launch()
+
+    def _launch(self):
+        """
+        start decoding the next segment
+        :return: None
+        """
+        if not self._segments or not self._running:
+            return
+
+        process = self._open_segment(*self._segments.popleft())
+        frames = queue.Queue(maxsize=self._buffer_frames)
+        threading.Thread(target=self._drain, args=(process, frames), daemon=True).start()
+        self._workers.append((process, frames))
+
+    def _put(self, frames, item):
+        """
+        queue an item unless the pipe is closed
+        :return: None
+        """
+        while self._running:
+            try:
+                frames.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _drain(self, process, frames):
+        """
+        read a segment process into its frame queue, None marks the end
+        :return: None
+        """
+        while self._running:
+            frame = process.stdout.read(self._frame_size)
+            if len(frame) < self._frame_size:
+                break
+            self._put(frames, frame)
+        self._put(frames, None)
+
+    def readinto(self, view):
+        """
+        read the next bytes in frame order
+        :param view: writable buffer
+        :return: int bytes read, 0 at the end
+        """
+        while self._chunk is None:
+            if not self._workers or not self._running:
+                return 0
+
+            try:
+                chunk = self._workers[0][1].get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+            if chunk is None:
+                self._workers.popleft()  # segment finished, keep the pool full
+                self._launch()
+                continue
+            self._chunk, self._chunk_offset = chunk, 0
+
+        count = min(len(view), self._frame_size - self._chunk_offset)
+        view[:count] = self._chunk[self._chunk_offset:self._chunk_offset + count]
+        self._chunk_offset += count
+        if self._chunk_offset == self._frame_size:
+            self._chunk = None
+        return count
+
+    @property
+    def pid(self):
+        """
+        returns the pid of the segment currently read
+        :return: int or None
+        """
+        return self._workers[0][0].pid if self._workers else None
+
+    def terminate(self):
+        self._running = False
+        for process, _ in self._workers:
+            process.terminate()
+
+    def kill(self):
+        self._running = False
+        for process, _ in self._workers:
+            process.kill()
+
+
+class FrameDecoder(object):
+    """
+    Decoder class reads frames from an ffmpeg pipe on a worker thread into a bounded queue
+    """
+
+    def __init__(self, pipe, resolution, video_format, start_index=0, queue_size=8, started=None, scheduler=None,
+                 on_first_frame=None):
+        """
+        constructor -> start the worker or register with a shared scheduler
+        :param pipe: popen object writing raw frames to stdout
+        :param resolution: int w int h of the piped frames
+        :param video_format: pygame buffer format
+        :param start_index: frame index of the first frame in the pipe
+        :param queue_size: max frames decoded ahead of the consumer
+        :param started: perf_counter time the pipe was requested, for latency measurement
+        :param scheduler: DecoderScheduler to decode on instead of an own thread
+        :param on_first_frame: callable receiving the first frame latency, called from the decoding thread
+        """
+        self._pipe = pipe  # assign pipe
+        self._resolution = resolution  # assign resolution
+        self._video_format = video_format  # assign format
+        self._frame_buffer_size = resolution[0] * resolution[1] * len(video_format)  # one byte per channel letter
+        self._queue = queue.Queue(maxsize=queue_size)  # ready-to-blit frames
+        self._free_slots = queue.Queue()  # buffers the worker may read into
+        self._shown_slot = None  # slot currently displayed by the consumer
+        self._pending = None  # frame taken from the queue but not due yet
+        self._next_index = start_index  # index of the next frame read from the pipe
+        self._running = True  # boolean to stop the worker
+        self._finished = False  # boolean set once the pipe is exhausted
+        self._started = time.perf_counter() if started is None else started  # pipe request time
+        self.first_frame_latency = None  # seconds from pipe request to the first decoded frame
+        self._on_first_frame = on_first_frame  # latency callback
+
+        # preallocated buffer pool: queued frames, one pending and one displayed
+        # every surface shares memory with its buffer, so steady state playback allocates nothing
+        for _ in range(queue_size + 2):
+            frame_buffer = bytearray(self._frame_buffer_size)
+            self._free_slots.put((frame_buffer, framecache.frame_surface(frame_buffer, resolution, video_format)))
+
+        # counters
+        self.underruns = 0  # requested frame was not decoded yet
+        self.dropped_frames = 0  # decoded frames that were never shown
+
+        self.priority = 0  # lower is decoded first by a shared scheduler
+        self.instrumentation = None  # Instrumentation or None
+        self._scheduler = scheduler  # shared worker pool or None
+        if scheduler is not None:
+            scheduler.register(self)  # scheduler workers call step
+        else:
+            self._thread = threading.Thread(target=self._run, daemon=True)  # create worker
+            self._thread.start()  # start decoding
+
+    def _read_into(self, frame_buffer):
+        """
+        fill a preallocated buffer from the pipe
+        :param frame_buffer: bytearray of one frame
+        :return: boolean, false at end of stream
+        """
+        view = memoryview(frame_buffer)
+        filled = 0
+        while filled < self._frame_buffer_size:
+            count = self._pipe.stdout.readinto(view[filled:] if filled else view)
+            if not count:
+                return False  # end of stream or pipe closed
+            filled += count
+        return True
+
+    def _decode(self, slot):
+        """
+        read the next frame into a slot
+        :param slot: (bytearray, pygame Surface)
+        :return: (index, slot), or None at end of stream
+        """
+        recorder = self.instrumentation
+        started = time.perf_counter() if recorder is not None else 0
+        if not self._read_into(slot[0]):
+            return None
+        if recorder is not None:
+            recorder.add(instrumentation.PIPE_READ, time.perf_counter() - started)
+            recorder.count(instrumentation.FRAMES_DECODED)
+            recorder.count(instrumentation.PIPE_BYTES, self._frame_buffer_size)
+
+        item = (self._next_index, slot)
+        self._next_index += 1
+        if self.first_frame_latency is None:
+            self.first_frame_latency = time.perf_counter() - self._started
+            if self._on_first_frame is not None:
+                self._on_first_frame(self.first_frame_latency)
+        return item
+
+    def _run(self):
+        """
+        worker loop, blocks when every buffer is in use (backpressure)
+        :return: None
+        """
+        while self._running:
+            try:
+                slot = self._free_slots.get(timeout=0.1)  # wait for the consumer to release a buffer
+            except queue.Empty:
+                continue
+
+            item = self._decode(slot)
+            if item is None:
+                break
+
+            while self._running:
+                try:
+                    self._queue.put(item, timeout=0.1)  # wait for the consumer
+                    break
+                except queue.Full:
+                    continue
+
+        self._finished = True
+
+    @property
+    def ready(self):
+        """
+        returns true if step would decode a frame without waiting for the consumer
+        :return: boolean
+        """
+        return self._running and not self._finished and not self._queue.full() and not self._free_slots.empty()
+
+    def step(self):
+        """
+        decode one frame, called by scheduler workers, never by two at once
+        :return: boolean, false once the pipe is exhausted
+        """
+        if self._queue.full():
+            return True  # consumer is behind
+        try:
+            slot = self._free_slots.get_nowait()
+        except queue.Empty:
+            return True  # consumer still holds every buffer
+
+        item = self._decode(slot) if self._running else None
+        if item is None:
+            self._free_slots.put(slot)
+            self._finished = True
+            return False
+
+        self._queue.put_nowait(item)  # only this worker fills the queue, room was checked above
+        return True
+
+    @property
+    def pipe(self):
+        """
+        returns the frame pipe, closed together with the decoder
+        :return: popen object or SegmentedPipe
+        """
+        return self._pipe
+
+    @property
+    def decoded_index(self):
+        """
+        index of the newest frame read from the pipe
+        :return: int, start index - 1 before the first frame
+        """
+        return self._next_index - 1
+
+    @property
+    def queue_depth(self):
+        """
+        number of decoded frames waiting to be shown
+        :return: int
+        """
+        return self._queue.qsize() + (self._pending is not None)
+
+    @property
+    def finished(self):
+        """
+        returns true once the pipe is exhausted and every frame was consumed
+        :return: boolean
+        """
+        return self._finished and self.queue_depth == 0
+
+    def get_frame(self, index):
+        """
+        pop frames up to index without blocking
+        :param index: wanted frame index
+        :return: (index, pygame Surface) of the newest frame <= index, or None
+                 the surface stays valid until the next call returns a frame
+        """
+        latest = None
+        while True:
+            if self._pending is None:
+                try:
+                    self._pending = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            if self._pending[0] > index:
+                break  # frame is not due yet
+
+            if latest is not None:
+                self.dropped_frames += 1  # skipped over without being shown
+                if self.instrumentation is not None:
+                    self.instrumentation.count(instrumentation.FRAMES_DROPPED)
+                self._free_slots.put(latest[1])  # recycle its buffer
+            latest, self._pending = self._pending, None
+
+            if latest[0] == index:
+                break
+
+        if latest is None or latest[0] != index:
+            if not self._finished:
+                self.underruns += 1  # wanted frame is not decoded yet
+                if self.instrumentation is not None:
+                    self.instrumentation.count(instrumentation.UNDERRUNS)
+            if latest is None:
+                return None
+
+        if self._shown_slot is not None:
+            self._free_slots.put(self._shown_slot)  # previous frame is no longer displayed
+        self._shown_slot = latest[1]
+        if self._scheduler is not None:
+            self._scheduler.wake()  # buffers were released
+        return latest[0], latest[1][1]
+
+    def stop(self):
+        """
+        stop the worker and release the buffer pool, the caller owns the pipe
+        the surface last returned by get_frame keeps its own buffer alive
+        :return: None
+        """
+        self._running = False
+        if self._scheduler is not None:
+            self._scheduler.unregister(self)
+
+        # drop queued and free buffers, a worker still reading keeps only its one slot until it exits
+        self._queue = queue.Queue()
+        self._free_slots = queue.Queue()
+        self._pending = None
+        self._shown_slot = None
 
 
 class VideoPlayer(object):
@@ -171,10 +1244,17 @@ class VideoPlayer(object):
     else:
         raise SystemExit("Your OS seems to be not supported :/")
 
-    THREAD_NUMBERS = 0  # set pipe threads
+    THREAD_NUMBERS = 0  # asset preparation threads, 0 lets ffmpeg decide
+    PREFETCH_FRAMES = 8  # frames decoded ahead by default
+    SYNC_TOLERANCE = 0.04  # allowed audio video drift in seconds
+    CATCHUP_SECONDS = 0.5  # decoder lag that triggers a re-seek instead of decoding the gap
+    PRELOAD_SECONDS = 1.0  # time before the end the next pass or clip is opened
 
     def __init__(self, filename, path="", position=(0, 0), resolution=None, doVideoResize=True, doVideoConvert=True,
-                 hasSound=True, bindGUI=True):
+                 hasSound=True, bindGUI=True, prefetchFrames=PREFETCH_FRAMES, useKeyframeIndex=True,
+                 useFrameCache=False, syncTolerance=SYNC_TOLERANCE, streamAudio=True, audioCache=False,
+                 scheduler=None, decodeThreads=None, decodeProcesses=None, pixelFormat=None, instrument=False,
+                 catchUpSeconds=CATCHUP_SECONDS, loop=False):
         """
         constructor -> set default args
         :param filename: filename
@@ -185,6 +1265,19 @@ class VideoPlayer(object):
         :param doVideoConvert: boolean if video should converted to the best format
         :param hasSound: boolean if video contains audio line
         :param bindGUI: boolean if hud should be displayed
+        :param prefetchFrames: number of frames the decoder thread may read ahead
+        :param useKeyframeIndex: boolean if seeks should decode forward from the nearest indexed keyframe
+        :param useFrameCache: boolean if frames should be decoded once into a memory mapped cache file
+        :param syncTolerance: allowed drift between video and audio in seconds
+        :param streamAudio: boolean if audio should be streamed in chunks instead of loaded as a whole
+        :param audioCache: boolean if audio should be extracted to a wave file instead of piped from ffmpeg
+        :param scheduler: DecoderScheduler shared with other players, or None for an own decoder thread
+        :param decodeThreads: ffmpeg -threads for playback, None shares the cores between active players
+        :param decodeProcesses: ffmpeg processes decoding gop segments, None segments 4k clips only
+        :param pixelFormat: ffmpeg pixel format of the frames, None matches the display surface set up beforehand
+        :param instrument: boolean if stage timers and counters should be collected from the start
+        :param catchUpSeconds: decoder lag in seconds before skipping ahead with a keyframe seek, None disables
+        :param loop: boolean if playback should restart without a gap, the next pass is decoded ahead of the end
         """
         if not os.path.isfile(os.path.join(path, filename)):  # check if file exists
             raise FileNotFoundError("File or path incorrect > ", path, filename)  # raise exit condition
@@ -193,79 +1286,112 @@ class VideoPlayer(object):
         self._filename = filename  # assign filename
         self._path = path  # assign file path
 
-        if not os.path.isdir("resources"):
-            os.makedirs("resources")  # create 'home' folder
-
-        if not os.path.isdir(os.path.join("resources", "resources_" + self._filename)):
-            os.makedirs("resources/resources_" + self._filename)  # create folder for video player instance
+        # convert, resize and extract audio in one ffmpeg pass, only missing artifacts are built
+        use_wave = hasSound and (audioCache or not streamAudio)  # whole sound loading needs the wave file
+        plan = plan_clip(filename, path, resolution, doVideoConvert, doVideoResize, use_wave, self.FFPROBE_BINARY)
+        if plan["OUTPUTS"]:
+            print("[INFO] Preparing video > ", self._path, self._filename)
+            print("[INFO] Depending on video size this may take a few minutes. One-time operation.")
+            run_plan(plan, self.FFMPEG_BINARY, self.THREAD_NUMBERS)
+            print("[INFO] Done.")
 
-        self._destination_path = "resources/resources_" + self._filename  # set destination path
-
-        if not self._filename.endswith(".mp4"):
-            if not os.path.isfile(os.path.join(self._destination_path, filename.split(".")[0] + ".mp4")):
-                if doVideoConvert:
-                    self._convert_video()  # convert video to mp4 if necessary
-
-            self._filename = self._filename.split(".")[0] + ".mp4"  # set new filename
-
-        self._origin_filename = self._filename  # set original filename to avoid extra parsing
-        self._origin_path = self._path  # set original filename to avoid extra parsing
-
-        # video
-        if resolution is not None:  # if resolution is not predefined
-            if not os.path.isfile(os.path.join(self._destination_path, "SCALED_%s" % self._filename)):
-                if doVideoResize:
-                    self._resize_video(resolution)  # resize video
-            else:
-                self._filename = "SCALED_%s" % self._filename  # set new filename
-                if tuple(self._get_video_resolution()) != resolution:
-                    os.remove(os.path.join(self._destination_path, self._filename))  # remove scaled video
-                    self._filename = self._filename[7:]
-                    self._resize_video(resolution)  # force resize
-                else:
-                    self._filename = self._filename[7:]
-
-            self._filename = "SCALED_%s" % self._filename  # set new filename
-            self._resize_resolution = resolution  # set resize resolution
+        self._destination_path = plan["DESTINATION"]  # set destination path
+        self._video_path, self._filename = os.path.split(plan["VIDEO"])  # file the frames are read from
+        self._do_resize = False  # only cached frames are scaled with pygame
 
         self.video_data = self._get_video_data()  # get video data as dict
 
         self._fps = self.video_data["FPS"]  # get fps
         self._total_frames = self.video_data["DURATION"]  # get total frames
         self._resolution = self.video_data["RESOLUTION"]  # get video resolution
-        self._frame_buffer_size = self._resolution[0] * self._resolution[1] * 3  # calculate frame buffer size
-        self._video_format = "RGB"  # set video format
+
+        # video
+        self._output_resolution = tuple(self._resolution)  # size of the piped frames
+        if resolution is not None and not doVideoResize:
+            self._output_resolution = tuple(resolution)  # no SCALED_ variant, ffmpeg scales while decoding
+        self._pix_fmt = pixelFormat or framecache.native_pix_fmt()  # display layout, blits need no conversion
+        self._bytes_per_pixel, self._video_format = framecache.PIXEL_FORMATS[self._pix_fmt]  # set video format
+        self._frame_buffer_size = self._output_resolution[0] * self._output_resolution[1] * self._bytes_per_pixel
 
         # audio
-        self._hasSound = hasSound
-        if self._hasSound:
-            self._extract_audio()  # extract video audio as wave file
-            self._audio = AudioAdapter(self._origin_filename, self._destination_path)  # create audio adapter instance
+        self._hasSound = hasSound and plan["SOURCE_AUDIO"] is not None  # False if the video has no audio line
+        if self._hasSound and not use_wave:
+            self._audio = StreamingAudioAdapter(  # decoded in real time, nothing written to disk
+                FFmpegAudioReader(plan["SOURCE"], self.FFMPEG_BINARY, self.video_data["SECONDS"])
+            )
+        elif self._hasSound and streamAudio:
+            self._audio = StreamingAudioAdapter(WaveReader(plan["AUDIO"]))  # constant memory
+        elif self._hasSound:
+            self._audio = AudioAdapter(os.path.basename(plan["AUDIO"]), os.path.dirname(plan["AUDIO"]))
 
         # private pygame necessary arguments
-        self._image = pygame.Surface(self._resolution)  # set default surface
+        self._image = pygame.Surface(self._output_resolution)  # set default surface
         self._image.fill((255, 0, 0))  # fill image red in case an error occurs
         self._rect = self._image.get_rect(topleft=position)  # define position
 
         # frame pipe
-        self._pipe = self._open_frame_pipe(0)  # open a frame pipe from the beginning of the video
+        self._prefetch_frames = prefetchFrames  # decoder queue size
+        self._use_keyframe_index = useKeyframeIndex  # frame accurate seeking
+        self._keyframe_index = None  # built on the first seek
+        self._seek_latency = collections.deque(maxlen=100)  # first frame latency of recent seeks
+        self._process_restarts = 0  # ffmpeg processes spawned after the first
+        self._frame_cache = None  # memory mapped frames replace the pipe when enabled
+        if useFrameCache:
+            self._frame_cache = self._open_frame_cache()
+            self._total_frames = self._frame_cache.total_frames
+
+        self._decode_threads = decodeThreads  # None -> adaptive
+        self._decode_processes = decodeProcesses  # None -> by resolution
+        if decodeProcesses is None:
+            self._decode_processes = decodeconfig.decode_processes(self._resolution, decodeconfig.active_players() + 1)
+        decodeconfig.register_player()  # counts towards the thread split of every player
+        self._unregister = weakref.finalize(self, decodeconfig.unregister_player)  # on close or collection, once
+        self._scheduler = scheduler  # shared decoder workers
+        self._priority = 0  # decoding priority on a shared scheduler
+        self._instrumentation = None  # Instrumentation while enabled
+        self._opened_decoders = 0  # pipes opened so far
+        self._decoder = self._open_decoder(0)  # open a decoder from the beginning of the video
+        self._next_decoder = None  # next loop pass, opened ahead of the end
+        self._loop = loop  # gapless looping
+        self._preload_frames = int(self.PRELOAD_SECONDS * self._fps)  # frames before the end to open the next pass
+        self._frame_offset = 0  # clock frames of the passes already played
+        if self._hasSound and loop:
+            self._audio.set_loop(self._total_frames / self._fps)  # audio wraps at the video length
 
         # time management
-        self._internal_current_time = 0  # init internal time
-        self._delta_time = 0  # init delta time
-        self._last_frame_time = 0  # init last frame time
+        self._clock = MasterClock(self._audio if self._hasSound else None, syncTolerance)  # audio master clock
+        self._repeated_frames = 0  # updates that held a frame because video was ahead
+        self._catch_up_frames = None if catchUpSeconds is None else max(int(catchUpSeconds * self._fps), 1)
+        self._catch_up_seeks = 0  # re-seeks made because the decoder fell behind
 
         # video management
         self._video_cursor = 0  # current video cursor
-        self._last_video_cursor = 0  # last video cursor
-        self._do_resize = False  # no resize is needed
+        self._last_video_cursor = -1  # last shown frame, none yet
+        self._scaled_image = None  # reused destination surface for scaling
         self._video_is_playing = False  # boolean to toggle video playback
-        self._first_call = True  # boolean to avoid wrong entry
 
         # GUI management
+        self._gui_is_enabled = False  # no hud by default
         if bindGUI:
             self._gui_is_enabled = True  # activate GUI
-            self._gui = GUIAdapter(self._resolution)  # create GUI instance
+            self._gui = GUIAdapter(self._output_resolution)  # create GUI instance
+
+        if instrument:
+            self.enable_instrumentation()
+
+    @classmethod
+    def preload(cls, clips, workers=None):
+        """
+        prepare a whole playlist across all cores without blocking
+        :param clips: iterable of (filename, path) or (filename, path, resolution),
+            longer tuples continue with the other PreparationPipeline.submit arguments
+        :param workers: concurrent clips, defaults to the cpu count
+        :return: list of PreparationJob with future and progress
+        """
+        pipeline = PreparationPipeline(workers, cls.FFMPEG_BINARY, cls.FFPROBE_BINARY, cls.THREAD_NUMBERS)
+        jobs = pipeline.preload(clips)
+        pipeline.shutdown(wait=False)  # running jobs finish, the pool is released afterwards
+        return jobs
 
     def play(self):
         """
@@ -280,23 +1406,49 @@ class VideoPlayer(object):
         :return: None
         """
         self._video_is_playing = False
+        self._clock.pause()
         if self._hasSound:
             self._audio.stop()  # stop audio playback
 
     def set_position(self, index):
         """
         set video and audio position
-        :param index: int
+        :param index: num in seconds
         :return: None
         """
+        self.set_frame(int(round(index * self._fps)))
+
+    def set_frame(self, frame):
+        """
+        frame accurate seek, decodes forward from the nearest keyframe
+        :param frame: int
+        :return: None
+        """
+        started = time.perf_counter()  # seek latency includes the process spawn
+        recorder = self._instrumentation
+
         if self._hasSound:
-            self._audio.set_pos(index)  # set audio pos
+            self._audio.set_pos(frame / self._fps)  # set audio pos to the start of the video frame
+            if recorder is not None:
+                recorder.add(instrumentation.AUDIO, time.perf_counter() - started)
+
+        self._close_decoder()
+        self._discard_next_decoder()
+        self._decoder = self._open_decoder(frame, started)  # set video pos
+        self._frame_offset = 0  # clock restarts in the first pass
+        self._video_cursor = frame  # set video cursor
+        self._last_video_cursor = frame - 1
+        self._clock.seek(frame / self._fps)
+        if recorder is not None:
+            recorder.add(instrumentation.SEEK, time.perf_counter() - started)
 
-        self._pipe.terminate()
-        self._pipe.kill()
-        self._pipe = self._open_frame_pipe(index)  # set video pos
-        self._video_cursor = index * self._fps  # set video cursor
-        self._last_video_cursor = int(index * self._fps)
+    @property
+    def seek_latency(self):
+        """
+        returns latencies of completed seeks, from request to first decoded frame
+        :return: list of float seconds
+        """
+        return list(self._seek_latency)
 
     @property
     def volume(self):
@@ -344,6 +1496,31 @@ class VideoPlayer(object):
 
         return self._audio.is_muted
 
+    @property
+    def decoder_stats(self):
+        """
+        returns decoder counters
+        :return: dictionary
+        """
+        return {
+            "QUEUE_DEPTH": self._decoder.queue_depth,
+            "UNDERRUNS": self._decoder.underruns,
+            "DROPPED_FRAMES": self._decoder.dropped_frames,
+            "PROCESS_RESTARTS": self._process_restarts,
+            "CATCH_UP_SEEKS": self._catch_up_seeks,
+        }
+
+    @property
+    def sync_stats(self):
+        """
+        returns audio video sync statistics, drift in seconds
+        :return: dictionary
+        """
+        stats = self._clock.stats
+        stats["DROPPED_FRAMES"] = self._decoder.dropped_frames
+        stats["REPEATED_FRAMES"] = self._repeated_frames
+        return stats
+
     @property
     def isplaying(self):
         """
@@ -355,83 +1532,293 @@ class VideoPlayer(object):
     def pause(self):
         """
         pause video and sound
+        the frame pipe stays open, the decoder is throttled by its full queue
         :return: None
         """
         self._video_is_playing = False
+        self._clock.pause()  # paused time is not played back
         if self._hasSound:
-            self._audio.stop()  # stop audio
+            self._audio.pause()  # pause audio
 
     def unpause(self):
         """
-        unpause video
+        unpause video without reopening the frame pipe
         :return: None
         """
         self._video_is_playing = True
-        self.set_position(self._last_video_cursor // self._fps)
+        if self._hasSound:
+            self._audio.unpause()  # resume audio where it stopped
 
     def update(self):
         """
         updates the frames
         :return: None
         """
-        if self._first_call:
-            self._first_call = False
-            self._last_frame_time = pygame.time.get_ticks()  # do this once to sync video - audio
-
-        self._internal_current_time = pygame.time.get_ticks()  # get ticks since last call in ms
-        self._delta_time = (self._internal_current_time - self._last_frame_time) / 1000.0  # calc delta time
+        recorder = self._instrumentation
+        update_started = time.perf_counter() if recorder is not None else 0
 
         if self._video_is_playing:
-            if not self._audio.is_playing and self._hasSound and not self._audio.is_muted:
+            if self._hasSound and not self._audio.is_playing and not self._audio.is_muted:
+                started = time.perf_counter() if recorder is not None else 0
+                self._audio.set_pos(self._clock.time())  # start where the video is, after a stop or unmute
                 self._audio.play()  # start audio playback
-
-            if int(self._video_cursor) != self._last_video_cursor:
-
-                if self._last_video_cursor < self._total_frames:
-                    difference = int(self._video_cursor) - self._last_video_cursor
-
-                    if difference > 1:
-                        for _ in range(difference - 1):
-                            self._read_frame()  # skips frames -> might be slow af
-
-                    raw_frame_buffer = self._read_frame()  # read frame
-                    self._image = pygame.image.frombuffer(raw_frame_buffer, self._resolution, self._video_format)
+                if recorder is not None:
+                    recorder.add(instrumentation.AUDIO, time.perf_counter() - started)
+
+            self._clock.start()  # starts with the first update to sync video - audio
+            self._video_cursor = self._clock.time() * self._fps  # frame selected by the master clock
+            cursor = int(self._video_cursor) - self._frame_offset  # frame of the current pass
+
+            ended = False
+            if self._loop:
+                if cursor >= self._total_frames:
+                    cursor = self._next_loop(cursor)  # swap in the decoder of the next pass
+                elif cursor >= self._total_frames - self._preload_frames and self._next_decoder is None:
+                    self._next_decoder = self._open_decoder(0)  # fills its queue while this pass ends
+            elif cursor >= self._total_frames:
+                cursor = self._total_frames - 1  # show the last frame, then stop
+                ended = True
+
+            if cursor < self._last_video_cursor:
+                self._repeated_frames += 1  # video is ahead of the audio, hold the current frame
+                if recorder is not None:
+                    recorder.count(instrumentation.FRAMES_REPEATED)
+
+            elif cursor != self._last_video_cursor:
+                started = time.perf_counter() if recorder is not None else 0
+                frame = self._decoder.get_frame(cursor)  # pop frame, never blocks
+                if recorder is not None:
+                    recorder.add(instrumentation.GET_FRAME, time.perf_counter() - started)
+
+                if frame is not None:
+                    self._last_video_cursor, self._image = frame  # update last video cursor
+                    if recorder is not None:
+                        recorder.count(instrumentation.FRAMES_SHOWN)
 
                     if self._do_resize:
+                        started = time.perf_counter() if recorder is not None else 0
                         self._image = self._scale(self._image)  # scale image if necessary
+                        if recorder is not None:
+                            recorder.add(instrumentation.SCALE, time.perf_counter() - started)
 
-                self._last_video_cursor = int(self._video_cursor)  # update last video cursor
-            self._video_cursor += self._delta_time * self._fps  # increase video cursor
-        self._last_frame_time = self._internal_current_time  # set last frame time
+                if not ended and self._is_lagging(cursor):
+                    self._catch_up(cursor)  # skip the gap instead of decoding it
+
+            if ended:
+                self.stop()  # end of clip, the last frame stays on screen
 
         # gui stuff goes here
         if self._gui_is_enabled:
             pass
 
+        if recorder is not None:
+            recorder.add(instrumentation.UPDATE, time.perf_counter() - update_started)
+            recorder.poll()  # due stats callbacks
+
     def render(self, surface):
         """
         renders current frame to a surface
         :param surface: pygame Surface
         :return: None
         """
+        if self._instrumentation is None:
+            surface.blit(self._image, self._rect)
+            return
+
+        started = time.perf_counter()
         surface.blit(self._image, self._rect)
+        self._instrumentation.add(instrumentation.RENDER, time.perf_counter() - started)
+
+    def thumbnails(self, count=32, size=(160, 90), keyframes=False):
+        """
+        get a thumbnail atlas for scrubbing previews, built in one ffmpeg pass and cached with the clip resources
+        :param count: number of thumbnails
+        :param size: (int w, int h) of one thumbnail
+        :param keyframes: boolean if thumbnails should be taken at keyframes, only keyframes are decoded then
+        :return: ThumbnailAtlas
+        """
+        video_file = os.path.join(self._video_path, self._filename)
+        keyframe_times = self._get_keyframe_index().keyframe_times if keyframes else None
+        return thumbnails.load(video_file, self._destination_path, count, size,
+                               thumbnails.KEYFRAMES if keyframes else thumbnails.EVEN, keyframe_times,
+                               self.FFMPEG_BINARY, self.FFPROBE_BINARY)
+
+    def enable_instrumentation(self, window=512):
+        """
+        start collecting stage timers and counters
+        :param window: samples kept per stage for percentiles
+        :return: Instrumentation
+        """
+        if self._instrumentation is None:
+            self._instrumentation = instrumentation.Instrumentation(window)
+            self._decoder.instrumentation = self._instrumentation
+            if self._next_decoder is not None:
+                self._next_decoder.instrumentation = self._instrumentation
+            if self._hasSound:
+                self._audio.instrumentation = self._instrumentation
+        return self._instrumentation
+
+    def disable_instrumentation(self):
+        """
+        stop collecting, playback is back to a single attribute check per stage
+        :return: None
+        """
+        self._instrumentation = None
+        self._decoder.instrumentation = None
+        if self._next_decoder is not None:
+            self._next_decoder.instrumentation = None
+        if self._hasSound:
+            self._audio.instrumentation = None
+
+    @property
+    def instrumentation(self):
+        """
+        returns the collector while instrumentation is enabled
+        :return: Instrumentation or None
+        """
+        return self._instrumentation
+
+    @property
+    def instrumentation_stats(self):
+        """
+        returns a snapshot of stage timers (ms) and counters
+        :return: dictionary or None if instrumentation is disabled
+        """
+        if self._instrumentation is None:
+            return None
+        return self._instrumentation.snapshot()
+
+    def add_stats_callback(self, callback, interval=1.0):
+        """
+        export snapshots to telemetry, callbacks run from update() so they must return quickly
+        :param callback: callable receiving the snapshot dictionary
+        :param interval: seconds between calls
+        :return: None
+        """
+        self.enable_instrumentation().add_callback(callback, interval)
 
     def _scale(self, image):
         """
-        scale image to resize resolution
+        scale a cached frame to the output resolution, piped frames arrive scaled
         :param image: pygame Surface
         :return: pygame Surface
         """
-        return pygame.transform.scale(image, self._resize_resolution)
+        if self._scaled_image is None or self._scaled_image.get_size() != self._output_resolution:
+            self._scaled_image = pygame.Surface(self._output_resolution, 0, image)  # allocate once per size
+
+        return pygame.transform.scale(image, self._output_resolution, self._scaled_image)
 
     def resize(self, resolution):
         """
-        set resize resolution
+        set output resolution, the frame pipe is reopened at the current frame with ffmpeg scaling to it
+        so smaller sizes also mean fewer bytes through the pipe
         :param resolution: int w int h
         :return: None
         """
-        self._resize_resolution = resolution
-        self._do_resize = True
+        resolution = tuple(resolution)
+        if resolution == self._output_resolution:
+            return
+
+        self._output_resolution = resolution
+        self._frame_buffer_size = resolution[0] * resolution[1] * self._bytes_per_pixel  # frame buffer size
+        self._image = pygame.transform.scale(self._image, resolution)  # shown until the reopened pipe delivers
+        self._rect.size = resolution
+        if self._gui_is_enabled:
+            self._gui.resize(resolution)
+
+        if self._frame_cache is not None:
+            self._do_resize = resolution != tuple(self._frame_cache.resolution)  # mapped frames keep their size
+            return
+
+        frame = min(max(int(self._video_cursor) - self._frame_offset, 0), self._total_frames)
+        self._close_decoder()
+        self._discard_next_decoder()  # decodes at the old size
+        self._decoder = self._open_decoder(frame)  # same position, new filter graph
+        self._last_video_cursor = frame - 1
+
+    @property
+    def finished(self):
+        """
+        returns True once the last frame is due, never while looping
+        :return: boolean
+        """
+        return not self._loop and int(self._video_cursor) - self._frame_offset >= self._total_frames
+
+    @property
+    def remaining(self):
+        """
+        returns the time left in the current pass
+        :return: float seconds
+        """
+        return max(self._total_frames - (self._video_cursor - self._frame_offset), 0) / self._fps
+
+    def warm(self):
+        """
+        read the first audio chunks ahead, the decoder already fills its queue since construction,
+        so a following play shows and sounds the first frame without waiting
+        :return: None
+        """
+        if self._hasSound:
+            self._audio.prime()
+
+    @property
+    def output_resolution(self):
+        """
+        returns the size frames are rendered at
+        :return: (int w, int h)
+        """
+        return self._output_resolution
+
+    @property
+    def rect(self):
+        """
+        returns the screen rect
+        :return: pygame Rect
+        """
+        return self._rect
+
+    @property
+    def blit_item(self):
+        """
+        returns the current frame as an entry for Surface.blits
+        :return: (pygame Surface, pygame Rect)
+        """
+        return self._image, self._rect
+
+    @property
+    def priority(self):
+        """
+        returns decoding priority on a shared scheduler, lower is served first
+        :return: int
+        """
+        return self._priority
+
+    @priority.setter
+    def priority(self, priority):
+        """
+        set decoding priority
+        :param priority: int
+        :return: None
+        """
+        self._priority = priority
+        self._decoder.priority = priority
+        if self._next_decoder is not None:
+            self._next_decoder.priority = priority
+
+    def close(self):
+        """
+        stop playback and release the decoder, its ffmpeg process and the audio
+        :return: None
+        """
+        self.stop()
+        self._close_decoder()
+        self._discard_next_decoder()
+        self._unregister()
+        if self._hasSound and hasattr(self._audio, "close"):
+            self._audio.close()
+        if self._frame_cache is not None:
+            self._image = self._image.copy()  # the shown frame may wrap mapped memory
+            self._frame_cache.close()
 
     def set_screen_position(self, position):
         """
@@ -440,149 +1827,237 @@ class VideoPlayer(object):
         """
         self._rect.topleft = position
 
-    def _open_frame_pipe(self, index):
+    def _open_frame_cache(self):
+        """
+        open the frame cache, decoding the video into it once
+        :return: FrameCache
+        """
+        cache_file = framecache.cache_path(self._destination_path, self._filename)
+        video_file = os.path.join(self._video_path, self._filename)
+
+        frame_cache = None
+        if not framecache.is_stale(cache_file, video_file):
+            frame_cache = framecache.FrameCache(cache_file)
+            if frame_cache.resolution != self._output_resolution or frame_cache.pix_fmt != self._pix_fmt:
+                frame_cache.close()  # built for another output resolution or display
+                frame_cache = None
+
+        if frame_cache is None:
+            print("[INFO] Building frame cache > ", self._path, self._filename)
+            framecache.build(video_file, cache_file, self._output_resolution, self._fps, self.FFMPEG_BINARY,
+                             self._pix_fmt, self.THREAD_NUMBERS)
+            print("[INFO] Done.")
+            frame_cache = framecache.FrameCache(cache_file)
+
+        return frame_cache
+
+    def _open_decoder(self, frame, started=None):
+        """
+        open a decoder starting at frame
+        :param frame: starting frame
+        :param started: perf_counter time of the request
+        :return: FrameDecoder or CachedFrameDecoder
+        """
+        if self._frame_cache is not None:
+            decoder = framecache.CachedFrameDecoder(self._frame_cache, started)  # no process needed
+            if started is not None:
+                self._seek_latency.append(decoder.first_frame_latency)
+            return decoder
+
+        if self._opened_decoders:
+            self._process_restarts += 1
+            if self._instrumentation is not None:
+                self._instrumentation.count(instrumentation.PROCESS_RESTARTS)
+        self._opened_decoders += 1
+
+        segments = [(frame, self._total_frames)]
+        if self._decode_processes > 1 and self._use_keyframe_index:
+            segments = decodeconfig.plan_segments(self._get_keyframe_index().keyframes, frame, self._total_frames)
+
+        if len(segments) > 1:
+            pipe = SegmentedPipe(segments, self._open_frame_pipe, self._frame_buffer_size, self._decode_processes)
+        else:
+            pipe = self._open_frame_pipe(frame)
+        decoder = FrameDecoder(pipe, self._output_resolution, self._video_format, frame, self._prefetch_frames,
+                               started, self._scheduler, self._seek_latency.append if started is not None else None)
+        decoder.priority = self._priority
+        decoder.instrumentation = self._instrumentation
+        return decoder
+
+    def _is_lagging(self, target):
+        """
+        check if the decoder fell too far behind the clock to catch up by decoding
+        :param target: frame selected by the clock
+        :return: boolean
+        """
+        if self._catch_up_frames is None or self._frame_cache is not None:
+            return False  # disabled, or mapped frames are always ready
+        if self._decoder.first_frame_latency is None:
+            return False  # previous seek is still starting, wait for it
+        if target >= self._total_frames or self._decoder.finished:
+            return False  # nothing left to skip to
+        return target - self._decoder.decoded_index > self._catch_up_frames
+
+    def _catch_up(self, target):
+        """
+        reopen the pipe ahead of the clock, frames in the gap are dropped by the select filter before
+        scaling and colour conversion, or never decoded at all when a later keyframe is closer
+        :param target: frame selected by the clock
+        :return: None
+        """
+        latencies = self.seek_latency[-5:]
+        expected = sorted(latencies)[len(latencies) // 2] if latencies else 0.1  # median of recent seeks
+        frame = min(target + int(expected * self._fps) + 1, self._total_frames - 1)  # where the clock will be
+
+        self._close_decoder()
+        self._decoder = self._open_decoder(frame, time.perf_counter())  # current image is held meanwhile
+        self._catch_up_seeks += 1
+        if self._instrumentation is not None:
+            self._instrumentation.count(instrumentation.CATCH_UP_SEEKS)
+
+    @property
+    def _pipe(self):
+        """
+        frame pipe of the current decoder
+        :return: popen object, SegmentedPipe or None with a frame cache
+        """
+        return getattr(self._decoder, "pipe", None)
+
+    def _close_decoder(self, decoder=None):
+        """
+        stop a decoder and its ffmpeg process
+        :param decoder: decoder to close, defaults to the current one
+        :return: None
+        """
+        decoder = self._decoder if decoder is None else decoder
+        decoder.stop()  # stop worker before closing its pipe
+        pipe = getattr(decoder, "pipe", None)
+        if pipe is not None:
+            pipe.terminate()
+            pipe.kill()
+
+    def _discard_next_decoder(self):
+        """
+        close the decoder opened for the next loop pass
+        :return: None
+        """
+        if self._next_decoder is not None:
+            self._close_decoder(self._next_decoder)
+            self._next_decoder = None
+
+    def _next_loop(self, cursor):
+        """
+        switch to the pre-opened decoder of the next pass, its first frames are already decoded
+        :param cursor: frame of the finished pass
+        :return: frame of the new pass
+        """
+        if self._next_decoder is None:
+            self._next_decoder = self._open_decoder(0)  # not warmed in time, open it now
+
+        self._close_decoder()
+        self._decoder, self._next_decoder = self._next_decoder, None
+        self._frame_offset += self._total_frames
+        self._last_video_cursor -= self._total_frames  # last frame of the previous pass stays on screen
+        return cursor - self._total_frames
+
+    def _get_keyframe_index(self):
+        """
+        get the keyframe index, built with ffprobe once per file
+        :return: KeyframeIndex
+        """
+        if self._keyframe_index is None:
+            self._keyframe_index = KeyframeIndex(
+                os.path.join(self._video_path, self._filename),
+                os.path.join(self._destination_path, "KEYFRAMES_%s.json" % self._filename),
+                self.FFPROBE_BINARY
+            )
+        return self._keyframe_index
+
+    def _open_frame_pipe(self, frame, end=None):
         """
         open ffmpeg frame pipe
-        :param index: starting index
+        :param frame: starting frame
+        :param end: frame after the last one, defaults to the end of the video
         :return: popen object
         """
+        end = self._total_frames if end is None else end
+        threads = self._decode_threads
+        if threads is None:
+            threads = decodeconfig.decode_threads(processes=self._decode_processes)
+        video_filter = 'scale=%d:%d' % self._output_resolution
+
+        if frame == 0:
+            seek = []  # nothing to skip
+        elif self._use_keyframe_index:
+            keyframe, keyframe_time = self._get_keyframe_index().seek_point(frame)
+            # jump straight to the keyframe, then drop the frames before the target ahead of scaling and conversion
+            seek = ['-ss', '%.6f' % (keyframe_time + 0.5 / self._fps), '-noaccurate_seek']
+            video_filter = 'select=gte(n\\,%d),%s' % (frame - keyframe, video_filter)
+        else:
+            seek = ['-ss', '%.6f' % (frame / self._fps)]
 
         command = [
             self.FFMPEG_BINARY,
-            '-loglevel', 'fatal',
-            '-ss', str(index),
-            '-i', os.path.join(self._destination_path, self._filename),
-            '-threads', str(self.THREAD_NUMBERS),
-            '-vf', 'scale=%d:%d' % (self._resolution[0], self._resolution[1]),
-            '-vframes', str(self._total_frames),
+            '-loglevel', 'fatal'
+        ] + seek + [
+            '-i', os.path.join(self._video_path, self._filename),
+            '-threads', str(threads),
+            '-vf', video_filter,
+            '-vsync', '0',
+            '-vframes', str(max(end - frame, 1)),
             '-f', 'image2pipe',
-            '-pix_fmt', 'rgb24',
+            '-pix_fmt', self._pix_fmt,
             '-vcodec', 'rawvideo', '-'
         ]
 
         return subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
 
-    def _read_frame(self):
-        """
-        reads a frame from the pipe
-        :return: raw frame data
-        """
-        return self._pipe.stdout.read(self._frame_buffer_size)
-
     def _get_video_data(self):
         """
         get video data
         :return: data dictionary
         """
+        data = self._probe()
+
         dictionary = {
             "NAME": self._filename,
             "PATH": self._path,
-            "FPS": self._get_video_fps(),
-            "RESOLUTION": self._get_video_resolution(),
-            "DURATION": self._get_total_frames(),
+            "FPS": data["FPS"],
+            "RESOLUTION": data["RESOLUTION"],
+            "DURATION": data["FRAMES"],
+            "SECONDS": data["DURATION"],
+            "PIX_FMT": data["PIX_FMT"],
+            "ROTATION": data["ROTATION"],
+            "TIME_BASE": data["TIME_BASE"],
+            "AUDIO": data["AUDIO"],
         }
 
         return dictionary
 
+    def _probe(self):
+        """
+        probe the current video file, served from the probe cache when already seen
+        :return: data dictionary
+        """
+        return probe(os.path.join(self._video_path, self._filename), self.FFPROBE_BINARY)
+
     def _get_video_fps(self):
         """
         get fps of video
-        :return: int/float
+        :return: float
         """
-
-        command = [
-            self.FFPROBE_BINARY,
-            '-v', '0', '-of', 'csv=p=0',
-            '-select_streams', 'v:0',
-            '-show_entries', 'stream=r_frame_rate',
-            os.path.join(self._destination_path, self._filename)
-        ]
-
-        fps = int(subprocess.check_output(command).decode("utf-8").split("/")[0])
-        return fps / 1000 if fps > 1000 else fps
+        return self._probe()["FPS"]
 
     def _get_video_resolution(self):
         """
         get video resolution
         :return: int w int h
         """
-        command = [
-            self.FFPROBE_BINARY,
-            '-v', 'error', '-select_streams',
-            'v:0', '-show_entries',
-            'stream=width,height', '-of',
-            'csv=s=x:p=0',
-            os.path.join(self._destination_path, self._filename)
-        ]
-
-        return [int(res) for res in subprocess.check_output(command).decode("utf-8").split("x")]
+        return self._probe()["RESOLUTION"]
 
     def _get_total_frames(self):
         """
         get video total frames
         :return: int
         """
-        command = [
-            self.FFPROBE_BINARY,
-            '-v', 'error', '-select_streams',
-            'v:0', '-show_entries',
-            'stream=nb_frames', '-of',
-            'default=nokey=1:noprint_wrappers=1',
-            os.path.join(self._destination_path, self._filename)
-        ]
-
-        return int(subprocess.check_output(command).decode("utf-8"))
-
-    def _resize_video(self, size):
-        """
-        resize video to
-        :param size: (int w,int h)
-        :return: None
-        """
-        print("[INFO] Resizing video > ", self._path, self._filename)
-        print("[INFO] Depending on video size this may take a few minutes. One-time operation.")
-
-        command = [
-            self.FFMPEG_BINARY,
-            "-loglevel", "quiet", "-stats",
-            '-i', os.path.join(self._path, self._filename),
-            '-threads', str(self.THREAD_NUMBERS), "-vf",
-            "scale=%d:%d" % (size[0], size[1]),
-            "%s/SCALED_%s" % (self._destination_path, self._filename)
-        ]
-
-        subprocess.call(command)  # call rescale command
-        print("[INFO] Done.")
-
-    def _convert_video(self):
-        """
-        convert video to mp4 to make it easer to access its data
-        :return: None
-        """
-        print("[INFO] Converting video > ", self._path, self._filename)
-        print("[INFO] Depending on video size this may take a few minutes. One-time operation.")
-        command = [
-            self.FFMPEG_BINARY,
-            "-i", os.path.join(self._path, self._filename),
-            "-loglevel", "quiet", "-stats",
-            os.path.join(self._destination_path, self._filename.split(".")[0] + ".mp4")
-        ]
-
-        subprocess.call(command)
-        print("[INFO] Done.")
-
-    def _extract_audio(self):
-        """
-        extract audio of video
-        :return: None
-        """
-
-        command = [
-            self.FFMPEG_BINARY,
-            '-loglevel', 'quiet',
-            '-i', os.path.join(self._origin_path, self._origin_filename),
-            '-vn', os.path.join(self._destination_path, self._origin_filename.split(".")[0] + ".wav")
-        ]
-
-        if not os.path.isfile(os.path.join(self._destination_path, self._origin_filename.split(".")[0] + ".wav")):
-            subprocess.call(command)
+        return self._probe()["FRAMES"]
@@ -1,9 +1,12 @@
 import os  # os module -> for path and file checking
 import subprocess  # subprocess module -> for ffmpeg communication
 import wave  # wave module -> for wave file processing
+import weakref  # weakref module -> for unregistering dropped players
 
 import pygame  # pygame module -> for frame displaying
 
+import decodeconfig  # adaptive ffmpeg threads
+
 pygame.mixer.pre_init(frequency=44100, size=-16, channels=2)  # pre init pygame mixer module
 
 if int(pygame.__version__.split(".")[0]) > 2:
@@ -80,7 +83,7 @@ class VideoPlayer(object):
     """
     FFMPEG_BINARY = "binaries/ffmpeg.exe"  # hard code ffmpeg
     FFPROBE_BINARY = "binaries/ffprobe.exe"  # hard code ffprobe
-    THREAD_NUMBERS = 0  # set pipe threads
+    THREAD_NUMBERS = None  # pipe threads, None shares the cores between the open players
 
     def __init__(self, filename, path="", position=(0, 0), resolution=None, doVideoResize=True, doVideoConvert=True,
                  hasSound=True, bindGUI=True):
@@ -144,6 +147,9 @@ class VideoPlayer(object):
         self._resolution = self.video_data["RESOLUTION"]  # get video resolution
         self._frame_buffer_size = self._resolution[0] * self._resolution[1] * 3  # calculate frame buffer size
         self._video_format = "RGB"  # set video format
+        self._frame_buffer = bytearray(self._frame_buffer_size)  # reused frame buffer
+        self._frame_image = pygame.image.frombuffer(self._frame_buffer, self._resolution, self._video_format)
+        self._scaled_image = None  # reused destination surface for scaling
 
         # audio
         self._hasSound = hasSound
@@ -157,6 +163,8 @@ class VideoPlayer(object):
         self._rect = self._image.get_rect(topleft=position)  # define position
 
         # frame pipe
+        decodeconfig.register_player()  # counts towards the thread split of every player
+        self._unregister = weakref.finalize(self, decodeconfig.unregister_player)  # once the player is collected
         self._pipe = self._open_frame_pipe(0)  # open a frame pipe from the beginning of the video
 
         # time management
@@ -229,8 +237,8 @@ class VideoPlayer(object):
                         for _ in range(difference - 1):
                             self._read_frame()  # skips frames -> might be slow af
 
-                    raw_frame_buffer = self._read_frame()  # read frame
-                    self._image = pygame.image.frombuffer(raw_frame_buffer, self._resolution, self._video_format)
+                    self._read_frame()  # read frame into the shared buffer
+                    self._image = self._frame_image
 
                     if self._do_resize:
                         self._image = self._scale(self._image)  # scale image if necessary
@@ -253,7 +261,10 @@ class VideoPlayer(object):
         :param image: pygame Surface
         :return: pygame Surface
         """
-        return pygame.transform.scale(image, self._resize_resolution)
+        if self._scaled_image is None or self._scaled_image.get_size() != tuple(self._resize_resolution):
+            self._scaled_image = pygame.Surface(self._resize_resolution, 0, image)  # allocate once per size
+
+        return pygame.transform.scale(image, self._resize_resolution, self._scaled_image)
 
     def _open_frame_pipe(self, index):
         """
@@ -261,13 +272,14 @@ class VideoPlayer(object):
         :param index: starting index
         :return: popen object
         """
+        threads = self.THREAD_NUMBERS if self.THREAD_NUMBERS is not None else decodeconfig.decode_threads()
 
         command = [
             self.FFMPEG_BINARY,
             '-loglevel', 'fatal',
             '-ss', str(index),
             '-i', os.path.join(self._destination_path, self._filename),
-            '-threads', str(self.THREAD_NUMBERS),
+            '-threads', str(threads),
             '-vf', 'scale=%d:%d' % (self._resolution[0], self._resolution[1]),
             '-vframes', str(self._total_frames),
             '-f', 'image2pipe',
@@ -279,10 +291,10 @@ class VideoPlayer(object):
 
     def _read_frame(self):
         """
-        reads a frame from the pipe
-        :return: raw frame data
+        reads a frame from the pipe into the reused frame buffer
+        :return: bytes read
         """
-        return self._pipe.stdout.read(self._frame_buffer_size)
+        return self._pipe.stdout.readinto(self._frame_buffer)
 
     def _get_video_data(self):
         """
@@ -361,7 +373,7 @@ class VideoPlayer(object):
             self.FFMPEG_BINARY,
             "-loglevel", "quiet", "-stats",
             '-i', os.path.join(self._path, self._filename),
-            '-threads', str(self.THREAD_NUMBERS), "-vf",
+            '-threads', '0', "-vf",  # one-time transcode, every core like prepare.run_plan
             "scale=%d:%d" % (size[0], size[1]),
             "%s/SCALED_%s" % (self._destination_path, self._filename)
         ]
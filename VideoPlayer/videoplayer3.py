@@ -1,8 +1,11 @@
 import os
 import subprocess
 import wave
+import weakref
 import pygame
 
+import decodeconfig
+
 pygame.mixer.pre_init(frequency=44100, size=-16, channels=1)
 
 
@@ -62,7 +65,7 @@ class AudioAdapter(object):
 class VideoPlayer(object):
     FFMPEG_BINARY = "binaries/ffmpeg.exe"
     FFPROBE_BINARY = "binaries/ffprobe.exe"
-    THREAD_NUM = 0
+    THREAD_NUM = None  # None shares the cores between the open players, an int forces the -threads value
 
     def __init__(self, filename, path="", position=(0, 0), resolution=None):
         if not os.path.isfile(os.path.join(path, filename)):
@@ -94,6 +97,8 @@ class VideoPlayer(object):
         self._rect = self._image.get_rect(topleft=position)  # get boundary
 
         # frame pipe
+        decodeconfig.register_player()  # counts towards the thread split of every player
+        self._unregister = weakref.finalize(self, decodeconfig.unregister_player)  # once the player is collected
         self._pipe = self._open_frame_pipe(0)  # open pipe at the beginning of the video
 
         # time management
@@ -106,6 +111,9 @@ class VideoPlayer(object):
         self._last_video_cursor = 0  # last video cursor
         self._frame_buffer_size = self._resolution[0] * self._resolution[1] * 3  # set frame buffer size for rgb24
         self._image_format = "RGB"
+        self._frame_buffer = bytearray(self._frame_buffer_size)  # reused frame buffer
+        self._frame_image = pygame.image.frombuffer(self._frame_buffer, self._resolution, self._image_format)
+        self._scaled_image = pygame.Surface(self._resize_resolution, 0, self._frame_image)  # reused scale target
         self._video_is_playing = False
 
         # audio management
@@ -152,7 +160,7 @@ class VideoPlayer(object):
         surface.blit(self._image, self._rect)
 
     def _scale(self):
-        self._image = pygame.transform.scale(self._image, self._resize_resolution)
+        self._image = pygame.transform.scale(self._image, self._resize_resolution, self._scaled_image)
 
     def _read_frame(self):
         """
@@ -161,8 +169,8 @@ class VideoPlayer(object):
         """
         if int(self._video_cursor) != self._last_video_cursor:
             if self._last_video_cursor < self._total_frames:
-                raw_image_buffer = self._pipe.stdout.read(self._frame_buffer_size)
-                self._image = pygame.image.frombuffer(raw_image_buffer, self._resolution, self._image_format)
+                self._pipe.stdout.readinto(self._frame_buffer)  # read into the shared buffer
+                self._image = self._frame_image
                 self._scale()
 
     def _open_frame_pipe(self, index):
@@ -171,11 +179,12 @@ class VideoPlayer(object):
         :param index: start index
         :return: PIP obj
         """
+        threads = self.THREAD_NUM if self.THREAD_NUM is not None else decodeconfig.decode_threads()
         command = [self.FFMPEG_BINARY,
                    '-loglevel', 'fatal',
                    '-ss', str(index / self._fps),
                    '-i', os.path.join(self._path, self._filename),
-                   '-threads', str(self.THREAD_NUM),
+                   '-threads', str(threads),
                    '-vf', 'scale=%d:%d' % (self._resolution[0], self._resolution[1]),
                    '-vframes', str(self._total_frames),
                    '-f', 'image2pipe',
@@ -1,10 +1,24 @@
+import importlib.util
+import os
 import subprocess
+import sys
 from pydub import AudioSegment
 import numpy as np
 import pygame
 pygame.init()
 pygame.mixer.init()
 
+VIDEOPLAYER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "VideoPlayer")
+if VIDEOPLAYER_DIR not in sys.path:
+    sys.path.append(VIDEOPLAYER_DIR)  # flat imports of the streaming player
+from probe import probe
+
+#   Loaded by path, the legacy videoplayer.py next to this file shadows the name
+_spec = importlib.util.spec_from_file_location("streaming_videoplayer", os.path.join(VIDEOPLAYER_DIR, "videoplayer.py"))
+streaming = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(streaming)
+
+
 def lts(l):
     s = ""
     for x in l:
@@ -13,15 +27,25 @@ def lts(l):
 
 
 class Audio():
-    def __init__(self, filepath, as_sound=False):
-        #   Consider switching to OGG for maximum compatibility
+    def __init__(self, filepath, as_sound=False, cache=False):
+        self.stream = None  # StreamingAudioAdapter unless a cached mp3 is requested
+        if not cache:
+            #   Decoded from ffmpeg stdout in 0.25 s chunks while playing: nothing written next to the source,
+            #   memory stays flat and nothing is decoded before the first frame
+            duration = probe(filepath)["DURATION"]
+            self.stream = streaming.StreamingAudioAdapter(streaming.FFmpegAudioReader(filepath, "ffmpeg", duration))
+            self.audio = self.stream
+            self.length = duration
+            return
+
         d = "/"
         s = [e + d for e in filepath.split(d) if e]
         s[-1] = s[-1].replace('/','').split('.')[0]
         print(s)
         path = lts(s)
-        pull_mp3_command = "ffmpeg -nostdin -n -i %s -ab 160k -ac 2 -ar 44100 -vn %s.mp3" % (filepath,path)
-        subprocess.call(pull_mp3_command, shell=True)
+        pull_mp3_command = ["ffmpeg", "-nostdin", "-n", "-i", filepath, "-ab", "160k", "-ac", "2", "-ar", "44100",
+                            "-vn", path + ".mp3"]
+        subprocess.call(pull_mp3_command)
         if as_sound:
 
             version = pygame.version.vernum[0]
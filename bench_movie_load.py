@@ -0,0 +1,56 @@
+"""
+Movie load benchmark -> per frame make_surface + rotate + flip vs bulk buffer wrapping
+usage: python bench_movie_load.py [video] [frames]
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")  # headless
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import numpy as np
+import pygame
+import skvideo.io
+
+from pygmov import frame_to_surface, frames_to_surfaces
+
+
+def rotate_flip(frame):
+    #   Load path used before, kept here as the baseline
+    surface = pygame.surfarray.make_surface(frame)
+    surface = pygame.transform.rotate(surface, -90)
+    return pygame.transform.flip(surface, True, False)
+
+
+def decode(video, frames):
+    return [frame for _, frame in zip(range(frames), skvideo.io.vreader(video))]
+
+
+def measure(name, convert, frames):
+    started = time.perf_counter()
+    surfaces = convert(frames)
+    elapsed = time.perf_counter() - started
+    print("%-14s %6d frames  %8.1f ms  %8.1f frames/s" % (name, len(surfaces), elapsed * 1000, len(surfaces) / elapsed))
+    return surfaces, elapsed
+
+
+if __name__ == "__main__":
+    video = sys.argv[1] if len(sys.argv) > 1 else "rsc_testing/fsf.mp4"
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 600
+
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+
+    frames = decode(video, count)  # decoding is the same for both paths and measured apart
+    print("decoded %d frames of %s" % (len(frames), video))
+
+    baseline, baseline_time = measure("rotate + flip", lambda frames: [rotate_flip(frame) for frame in frames], frames)
+    single, _ = measure("per frame", lambda frames: [frame_to_surface(frame) for frame in frames], frames)
+    bulk, bulk_time = measure("bulk", lambda frames: list(frames_to_surfaces(frames)), frames)
+    print("speedup        %.1fx" % (baseline_time / bulk_time))
+
+    same = all(
+        np.array_equal(pygame.surfarray.pixels3d(a), pygame.surfarray.pixels3d(b)) for a, b in zip(baseline, bulk)
+    )
+    print("identical      %s" % same)
@@ -0,0 +1,350 @@
+"""
+headless benchmark suite -> load time, sustained fps, unthrottled decode fps, per frame latency, seek latency,
+peak rss and allocations for every player implementation, written as json so runs can be compared for regressions
+usage: python bench_suite.py [--clips fbms.mp4 fsf.mp4] [--players ...] [--output results.json] [--baseline old.json]
+"""
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+VIDEOPLAYER_DIR = os.path.join(ROOT, "VideoPlayer")
+CLIPS_DIR = os.path.join(ROOT, "rsc_testing")
+
+PLAYERS = ["videoplayer", "legacy", "videoplayer3", "movie", "movie_stream"]
+SEEKS = 20  # random seeks per clip
+SEEK_TIMEOUT = 10  # seconds to wait for a seek before giving up
+
+# metric -> True if larger is better, used by --baseline
+METRICS = {
+    "LOAD_SECONDS": False,
+    "FPS": True,
+    "DECODE_FPS": True,
+    "FRAME_MS_P50": False,
+    "FRAME_MS_P95": False,
+    "FRAME_MS_P99": False,
+    "SEEK_MS_P50": False,
+    "SEEK_MS_P95": False,
+    "PEAK_RSS_MB": False,
+    "ALLOCATED_KB_PER_FRAME": False,
+    "RETAINED_BLOCKS_PER_FRAME": False,
+}
+
+
+def _load_module(name, filename):
+    spec = importlib.util.spec_from_file_location(name, filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class PlayerAdapter(object):
+    """
+    Common surface over the player implementations: step draws one loop iteration and
+    returns the shown frame index, seek returns once the frame is decoded or None if unsupported,
+    decode pulls frames as fast as they are produced and returns frames per second or None if unsupported
+    """
+
+    def __init__(self, player, fps, frames):
+        self.player = player
+        self.fps = fps
+        self.frames = frames
+
+    def play(self):
+        self.player.play()
+
+    def step(self, screen):
+        self.player.update()
+        self.player.render(screen)
+        return self.player._last_video_cursor
+
+    def seek(self, frame):
+        return None
+
+    def decode(self, seconds):
+        #   the legacy players read their pipe on the caller thread, so read it directly
+        frames = 0
+        started = time.perf_counter()
+        while time.perf_counter() - started < seconds:
+            if self.player._pipe.stdout.readinto(self.player._frame_buffer) != len(self.player._frame_buffer):
+                break
+            frames += 1
+        return frames / (time.perf_counter() - started)
+
+    def close(self):
+        self.player.stop()
+
+
+class VideoPlayerAdapter(PlayerAdapter):
+
+    def seek(self, frame):
+        count = len(self.player.seek_latency) + 1
+        self.player.set_frame(frame)
+        deadline = time.perf_counter() + SEEK_TIMEOUT
+        while len(self.player.seek_latency) < count and time.perf_counter() < deadline:
+            time.sleep(0.0005)
+        return self.player.seek_latency[-1] if len(self.player.seek_latency) == count else None
+
+    def decode(self, seconds):
+        self.player.set_frame(0)
+        index = 0
+        started = time.perf_counter()
+        while time.perf_counter() - started < seconds:
+            if self.player._decoder.get_frame(index) is not None:
+                index += 1
+            elif self.player._decoder.finished:
+                break
+            else:
+                time.sleep(0.0005)
+        return index / (time.perf_counter() - started)
+
+    def close(self):
+        self.player.close()
+
+
+class MovieAdapter(PlayerAdapter):
+
+    def step(self, screen):
+        cursor = self.player.cursor()
+        screen.blit(self.player.frame(cursor), (0, 0))
+        return cursor
+
+    def seek(self, frame):
+        started = time.perf_counter()
+        if self.player.stream is not None:
+            self.player.stream.get(frame, block=True)
+        else:
+            self.player.source_frame(frame)
+        return time.perf_counter() - started
+
+    def decode(self, seconds):
+        if self.player.stream is None:
+            return None  # every frame was decoded while loading
+        index = 0
+        started = time.perf_counter()
+        while time.perf_counter() - started < seconds and index < self.player.stream.length:
+            if self.player.stream.get(index, block=True) is None:
+                break
+            index += 1
+        return index / (time.perf_counter() - started)
+
+    def close(self):
+        self.player.stop()
+        if self.player.stream is not None:
+            self.player.stream.close()
+
+
+def open_player(name, clip, arguments):
+    """
+    import and construct one player, every worker process imports only its own module
+    :return: PlayerAdapter
+    """
+    path, filename = os.path.split(clip)
+    if name == "videoplayer":
+        sys.path.insert(0, VIDEOPLAYER_DIR)
+        from videoplayer import VideoPlayer
+        VideoPlayer.FFMPEG_BINARY, VideoPlayer.FFPROBE_BINARY = arguments.ffmpeg, arguments.ffprobe
+        player = VideoPlayer(filename, path, hasSound=arguments.audio, bindGUI=False)
+        return VideoPlayerAdapter(player, player.video_data["FPS"], player.video_data["DURATION"])
+
+    if name in ("legacy", "videoplayer3"):
+        module_file = os.path.join(ROOT, "videoplayer.py") if name == "legacy" else \
+            os.path.join(VIDEOPLAYER_DIR, "videoplayer3.py")
+        module = _load_module(name, module_file)
+        module.VideoPlayer.FFMPEG_BINARY = arguments.ffmpeg
+        module.VideoPlayer.FFPROBE_BINARY = arguments.ffprobe
+        player = module.VideoPlayer(filename, path)
+        return PlayerAdapter(player, player.video_data["FPS"], player.video_data["DURATION"])
+
+    if name in ("movie", "movie_stream"):
+        sys.path.insert(0, ROOT)
+        from pygmov import Movie
+        player = Movie(filename, clip, audio_as_sound=True, stream=name == "movie_stream")
+        return MovieAdapter(player, player.framerate, player.length)
+
+    raise ValueError("Unknown player > ", name)
+
+
+def _percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def run_worker(name, clip, arguments):
+    """
+    benchmark one player on one clip in this process
+    :return: result dictionary
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")  # headless
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    import pygame
+    import resource
+
+    pygame.init()
+    screen = pygame.display.set_mode((1280, 720))
+
+    started = time.perf_counter()
+    adapter = open_player(name, clip, arguments)
+    load_seconds = time.perf_counter() - started
+
+    # sustained playback: unthrottled loop, frames shown per second of wall time
+    adapter.play()
+    frame_times = []
+    shown = set()
+    started = time.perf_counter()
+    while time.perf_counter() - started < arguments.seconds:
+        frame_started = time.perf_counter()
+        shown.add(adapter.step(screen))
+        pygame.event.pump()
+        frame_times.append(time.perf_counter() - frame_started)
+    fps = len(shown) / (time.perf_counter() - started)
+
+    # allocations: python heap only, SDL surface memory shows up in the peak rss instead
+    # the peak is reset every step, so memory allocated and freed within a step still counts
+    tracemalloc.start()
+    blocks = sys.getallocatedblocks()
+    allocated = 0
+    shown_before = len(shown)
+    for _ in range(arguments.allocation_steps):
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        shown.add(adapter.step(screen))
+        allocated += tracemalloc.get_traced_memory()[1] - before
+    allocated_frames = max(len(shown) - shown_before, 1)
+    retained_blocks = sys.getallocatedblocks() - blocks  # net growth, frees in between are not seen
+    tracemalloc.stop()
+
+    # seeks
+    random.seed(0)
+    seek_times = []
+    for _ in range(SEEKS):
+        latency = adapter.seek(random.randrange(max(adapter.frames, 1)))
+        if latency is None:
+            break
+        seek_times.append(latency)
+
+    # unthrottled decoding, FPS above is capped at the clip frame rate by the clock driven players
+    decode_fps = adapter.decode(arguments.seconds)
+
+    adapter.close()
+
+    return {
+        "PLAYER": name,
+        "CLIP": os.path.basename(clip),
+        "SOURCE_FPS": adapter.fps,
+        "LOAD_SECONDS": load_seconds,
+        "FPS": fps,
+        "DECODE_FPS": decode_fps,
+        "FRAMES_SHOWN": len(shown),
+        "FRAME_MS_P50": _percentile(frame_times, 0.50) * 1000,
+        "FRAME_MS_P95": _percentile(frame_times, 0.95) * 1000,
+        "FRAME_MS_P99": _percentile(frame_times, 0.99) * 1000,
+        "SEEK_MS_P50": None if not seek_times else statistics.median(seek_times) * 1000,
+        "SEEK_MS_P95": None if not seek_times else _percentile(seek_times, 0.95) * 1000,
+        "PEAK_RSS_MB": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0,  # linux reports kb
+        "ALLOCATED_KB_PER_FRAME": allocated / 1024.0 / allocated_frames,
+        "RETAINED_BLOCKS_PER_FRAME": retained_blocks / float(allocated_frames),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """
+    list metrics that got worse than the baseline by more than tolerance
+    :return: list of strings
+    """
+    previous = dict(((entry["PLAYER"], entry["CLIP"]), entry) for entry in baseline["RESULTS"] if "ERROR" not in entry)
+    regressions = []
+    for entry in results:
+        old = previous.get((entry["PLAYER"], entry["CLIP"]))
+        if old is None or "ERROR" in entry:
+            continue
+        for metric, larger_is_better in METRICS.items():
+            if entry.get(metric) is None or not old.get(metric):
+                continue
+            change = (entry[metric] - old[metric]) / abs(old[metric])
+            if (-change if larger_is_better else change) > tolerance:
+                regressions.append("%s %s %s %.3f -> %.3f (%+.0f%%)" % (
+                    entry["PLAYER"], entry["CLIP"], metric, old[metric], entry[metric], change * 100
+                ))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every player implementation headlessly.")
+    parser.add_argument("--clips", nargs="+", default=["fbms.mp4", "fsf.mp4"], help="clips in rsc_testing or paths")
+    parser.add_argument("--players", nargs="+", default=PLAYERS, choices=PLAYERS)
+    parser.add_argument("--seconds", type=float, default=5.0, help="sustained playback per run")
+    parser.add_argument("--allocation-steps", type=int, default=200, help="loop iterations traced for allocations")
+    parser.add_argument("--no-audio", dest="audio", action="store_false", help="disable audio where optional")
+    parser.add_argument("--ffmpeg", default="ffmpeg", help="ffmpeg executable")
+    parser.add_argument("--ffprobe", default="ffprobe", help="ffprobe executable")
+    parser.add_argument("--output", default="bench_results.json", help="json results file")
+    parser.add_argument("--baseline", help="earlier results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed relative regression")
+    parser.add_argument("--worker", nargs=2, metavar=("PLAYER", "CLIP"), help=argparse.SUPPRESS)
+    arguments = parser.parse_args()
+
+    if arguments.worker:
+        print(json.dumps(run_worker(arguments.worker[0], arguments.worker[1], arguments)))
+        return 0
+
+    results = []
+    for clip in arguments.clips:
+        clip = clip if os.path.isfile(clip) else os.path.join(CLIPS_DIR, clip)
+        for name in arguments.players:
+            # one process per run so peak rss and imports are not shared between players
+            command = [sys.executable, os.path.abspath(__file__), "--worker", name, clip,
+                       "--seconds", str(arguments.seconds), "--allocation-steps", str(arguments.allocation_steps),
+                       "--ffmpeg", arguments.ffmpeg, "--ffprobe", arguments.ffprobe]
+            if not arguments.audio:
+                command.append("--no-audio")
+            process = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            lines = process.stdout.decode("utf-8").strip().splitlines()
+            if process.returncode == 0 and lines:
+                entry = json.loads(lines[-1])
+                decode_fps = "-" if entry["DECODE_FPS"] is None else "%.1f" % entry["DECODE_FPS"]
+                print("%-13s %-10s load %6.2f s  fps %6.1f  decode %6s  p95 %6.2f ms  rss %7.1f MB" % (
+                    name, entry["CLIP"], entry["LOAD_SECONDS"], entry["FPS"], decode_fps, entry["FRAME_MS_P95"],
+                    entry["PEAK_RSS_MB"]
+                ))
+            else:
+                error = process.stderr.decode("utf-8").strip().splitlines()
+                entry = {"PLAYER": name, "CLIP": os.path.basename(clip), "ERROR": error[-1] if error else "failed"}
+                print("%-13s %-10s error: %s" % (name, entry["CLIP"], entry["ERROR"]))
+            results.append(entry)
+
+    report = {
+        "META": {
+            "TIME": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "PYTHON": platform.python_version(),
+            "PLATFORM": platform.platform(),
+            "CPU_COUNT": os.cpu_count(),
+            "SECONDS": arguments.seconds,
+        },
+        "RESULTS": results,
+    }
+    with open(arguments.output, "w") as output:
+        json.dump(report, output, indent=2)
+    print("[INFO] Results written > ", arguments.output)
+
+    if arguments.baseline:
+        with open(arguments.baseline, "r") as baseline:
+            regressions = compare(results, json.load(baseline), arguments.tolerance)
+        for regression in regressions:
+            print("[REGRESSION] " + regression)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
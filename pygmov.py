@@ -1,10 +1,18 @@
-import skvideo, pygame, sys
+import skvideo, pygame, sys, os
 import skvideo.io
-from threading import Thread
-from copy import copy
+import numpy as np
+from threading import Thread, Condition
+from collections import OrderedDict
 from audio import Audio
 import warnings
 import datetime
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "VideoPlayer"))  # shared helpers
+from probe import probe
+from prepare import destination_path
+import framecache
+import thumbnails
 
 #TESTING VIDEOPLAYER
 import videoplayer
@@ -13,104 +21,396 @@ import videoplayer
 pygame.init()
 pygame.mixer.init()
 
-cursor, cursor_inc = 0, 0
-
 
 # THIS REQUIRES THE FFMPEG BINARIES: ffmpeg.exe, ffprobe.exe
 
-def cursor_loop(framerate, length, audio):
-    global cursor_inc, cursor
-    c = pygame.time.Clock()
-    #   FOR SYNCING
-    secs_per_frame = 1 / framerate
-    playing = False
-    while True:
-        #   NOT DONE HERE
-        #   print("Music pos: %d")
-        if cursor_inc != 0 and not playing:
-            if isinstance(audio, str):
-                if pygame.mixer.music.get_pos() != -1:
-                    pygame.mixer.music.unpause()
-                else:
-                    print("Playing music")
-                    pygame.mixer.music.play()
-            else:
-                audio.play()
-            cursor = 0
-            playing = True
-        elif cursor_inc == 0:
-            if isinstance(audio, str):
-                pygame.mixer.music.pause()
-            else:
-                audio.stop()
-            playing = False
+class MovieClock():
+    """
+    Per movie playback clock. The cursor is derived from perf_counter when it is read,
+    so no thread runs between frames, a stopped movie costs no CPU and every movie keeps its own position.
+    """
 
-        cursor += cursor_inc
-        if cursor == length:
-            if isinstance(audio, str):
-                pygame.mixer.music.rewind()
-            else:
-                audio.stop()
-                audio.play()
-            cursor = 0
-        c.tick(framerate)
+    def __init__(self, framerate, length):
+        self.framerate = framerate
+        self.length = max(1, length)
+        self.playing = False
+        self.anchor_time = 0  # perf_counter time of the anchor
+        self.anchor_frame = 0  # frame position at the anchor, may run past length while looping
+        self.loops = 0  # completed loops seen by the last tick
+
+    def elapsed_frames(self):
+        if not self.playing:
+            return self.anchor_frame
+        return self.anchor_frame + (time.perf_counter() - self.anchor_time) * self.framerate
+
+    def start(self):
+        if not self.playing:
+            self.anchor_time = time.perf_counter()
+            self.playing = True
+
+    def pause(self):
+        if self.playing:
+            self.anchor_frame = self.elapsed_frames()
+            self.playing = False
+
+    def seek(self, frame):
+        self.anchor_frame = frame
+        self.anchor_time = time.perf_counter()
+        self.loops = 0
+
+    def tick(self):
+        """
+        returns (cursor, wrapped), wrapped is True once for every pass over the end of the movie
+        """
+        position = int(self.elapsed_frames())
+        loops = position // self.length
+        wrapped = loops != self.loops
+        self.loops = loops
+        return position % self.length, wrapped
+
+
+def frame_to_surface(frame):
+    """
+    wrap a skvideo frame (height, width, 3) as an upright pygame Surface
+    rows are already in the row major RGB layout pygame buffers use, so no rotate or flip is needed
+    """
+    frame = np.ascontiguousarray(frame)
+    return pygame.image.frombuffer(frame, (frame.shape[1], frame.shape[0]), "RGB")  # surface keeps frame alive
+
+
+def frames_to_surfaces(frames, batch_size=32):
+    """
+    wrap skvideo frames in bulk: each batch is stacked into one array and every surface shares a slice of it,
+    so loading allocates once per batch instead of three full frames per frame
+    """
+    batch = []
+    for frame in frames:
+        batch.append(frame)
+        if len(batch) == batch_size:
+            for surface in _batch_to_surfaces(batch):
+                yield surface
+            batch = []
+    for surface in _batch_to_surfaces(batch):
+        yield surface
+
+
+def _batch_to_surfaces(batch):
+    if not batch:
+        return []
+    stacked = np.stack(batch)  # (frames, height, width, 3), contiguous
+    size = (stacked.shape[2], stacked.shape[1])
+    return [pygame.image.frombuffer(stacked[index], size, "RGB") for index in range(len(stacked))]
+
+
+class FrameStream():
+    """
+    Decodes frames ahead of the playback cursor into a bounded ring of surfaces.
+    At most look_behind + look_ahead surfaces are kept alive, whatever the clip length.
+    """
+
+    def __init__(self, filepath, framerate, length, look_ahead=60, look_behind=30):
+        self.filepath = filepath
+        self.framerate = framerate
+        self.length = length
+        self.look_ahead = max(1, look_ahead)
+        self.look_behind = max(0, look_behind)
+        self.frames = {}  # frame index -> surface, bounded by the window around the cursor
+        self.cursor = 0  # last frame requested by the consumer
+        self.next_frame = 0  # next frame the decoder thread will produce
+        self.restart_at = 0  # frame to reopen the reader at, None while decoding sequentially
+        self.closed = False
+        self.condition = Condition()
+        self.thread = Thread(target=self._decode_loop, daemon=True)
+        self.thread.start()
+
+    def _open_reader(self, index):
+        if index == 0:
+            return skvideo.io.vreader(self.filepath)
+        #   Seeking before the input keeps the decode cost proportional to the window, not the offset.
+        #   skvideo sizes the read from the whole file, so bound it or it reads past the end
+        return skvideo.io.vreader(self.filepath, inputdict={'-ss': '%.6f' % (index / self.framerate)},
+                                  num_frames=self.length - index)
+
+    def _wants_more(self):
+        return self.restart_at is not None or \
+            self.next_frame < min(self.length, self.cursor + self.look_ahead)
+
+    def _evict(self):
+        lowest = self.cursor - self.look_behind
+        highest = self.cursor + self.look_ahead
+        for index in [i for i in self.frames if i < lowest or i >= highest]:
+            del self.frames[index]
+
+    def _fail(self, index):
+        #   Called with the condition held: end the stream so blocked consumers return
+        self.length = index
+        self.closed = True
+        self.condition.notify_all()
+
+    def _decode_loop(self):
+        reader = None
+        while True:
+            with self.condition:
+                while not self.closed and not self._wants_more():
+                    self.condition.wait()
+                if self.closed:
+                    break
+                if self.restart_at is not None:
+                    if reader is not None:
+                        reader.close()
+                    try:
+                        reader = self._open_reader(self.restart_at)
+                    except Exception:
+                        reader = None
+                        self._fail(self.restart_at)
+                        break
+                    self.next_frame = self.restart_at
+                    self.restart_at = None
+                index = self.next_frame
+                current = reader
+
+            try:
+                frame = next(current)
+            except StopIteration:
+                with self.condition:
+                    if self.restart_at is None:
+                        #   Container reported more frames than it holds
+                        self.length = index
+                        self.condition.notify_all()
+                continue
+            except Exception:
+                with self.condition:
+                    self._fail(index)
+                break
+            surface = frame_to_surface(frame)
+
+            with self.condition:
+                if self.restart_at is None and index == self.next_frame:
+                    self.frames[index] = surface
+                    self.next_frame = index + 1
+                    self._evict()
+                    self.condition.notify_all()
+        if reader is not None:
+            reader.close()
+
+    def get(self, index, block=False):
+        """
+        returns the surface for frame index, or None if it is not decoded yet and block is False
+        """
+        with self.condition:
+            self.cursor = index
+            if index not in self.frames and \
+                    not (self.restart_at is None and self.next_frame <= index < self.next_frame + self.look_ahead):
+                #   Outside the window: jump the reader instead of decoding everything in between
+                self.frames.clear()
+                self.restart_at = index
+            self._evict()
+            self.condition.notify_all()
+            while block and index not in self.frames and index < self.length and not self.closed:
+                self.condition.wait()
+            return self.frames.get(index)
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.frames.clear()
+            self.condition.notify_all()
+
+
+class Transform():
+    """
+    Composable frame transform, applied as crop -> scale -> flip -> rotate
+    """
+
+    def __init__(self, angle=0, flip_x=False, flip_y=False, scale=1, crop=None):
+        self.angle = angle
+        self.flip_x = flip_x
+        self.flip_y = flip_y
+        self.scale = scale
+        self.crop = crop  # (x, y, w, h) in source pixels or None
+
+    def key(self):
+        return (self.angle % 360, bool(self.flip_x), bool(self.flip_y), self.scale,
+                None if self.crop is None else tuple(self.crop))
+
+    def is_identity(self):
+        return self.key() == (0, False, False, 1, None)
+
+    def apply(self, surface):
+        if self.crop is not None:
+            surface = surface.subsurface(pygame.Rect(self.crop))
+        if self.scale != 1:
+            w, h = surface.get_size()
+            surface = pygame.transform.scale(surface, (int(w * self.scale), int(h * self.scale)))
+        if self.flip_x or self.flip_y:
+            surface = pygame.transform.flip(surface, self.flip_x, self.flip_y)
+        if self.angle % 360:
+            surface = pygame.transform.rotate(surface, self.angle)
+        return surface
 
 
 class Movie():
-    def __init__(self, name, filepath, audio_as_sound=False):
+    def __init__(self, name, filepath, audio_as_sound=False, stream=False, look_ahead=60, look_behind=30,
+                 frame_cache=False, transform_cache_size=120, audio_cache=False, convert=False):
+        self.filepath = filepath
         self.movie = []
-        vr = skvideo.io.vreader(filepath)
-        self.framerate = skvideo.io.ffprobe(filepath)['video']['@avg_frame_rate'].split('/')
-        self.framerate = float(int(self.framerate[0]) / int(self.framerate[1]))
+        self.convert = convert  # convert held surfaces to the display format once, needs a display mode
+        self.stream = None
+        self.cache = None
+        self.last_surface = None
+        self.transform = Transform()
+        self.transform_cache = OrderedDict()  # (frame, transform key) -> transformed surface, LRU order
+        self.transform_cache_size = transform_cache_size
+        metadata = probe(filepath)
+        self.framerate = metadata['FPS']
         print("FR: %s" % self.framerate)
         start = datetime.datetime.now()
-        for frame in vr:
-            surface = pygame.surfarray.make_surface(frame)
-            surface = pygame.transform.rotate(surface, -90)
-            surface = pygame.transform.flip(surface, True, False)
-            self.movie.append(surface)
+        if frame_cache:
+            #   Same cache file as VideoPlayer, resources_<name>/FRAMES_<name>.frames; decoded once, then mapped
+            name = os.path.basename(filepath)
+            cache_file = framecache.cache_path(destination_path(name), name)
+            if not framecache.is_stale(cache_file, filepath):
+                self.cache = framecache.FrameCache(cache_file)
+                if tuple(self.cache.resolution) != tuple(metadata['RESOLUTION']):
+                    self.cache.close()  # scaled by a VideoPlayer, any pixel format is fine
+                    self.cache = None
+            if self.cache is None:
+                framecache.build(filepath, cache_file, metadata['RESOLUTION'], self.framerate,
+                                 pix_fmt=framecache.native_pix_fmt())
+                self.cache = framecache.FrameCache(cache_file)
+            self.length = self.cache.total_frames
+        elif stream:
+            self.length = metadata['FRAMES']
+            self.stream = FrameStream(filepath, self.framerate, self.length, look_ahead, look_behind)
+            self.stream.get(0, block=True)
+        else:
+            vr = skvideo.io.vreader(filepath)
+            for surface in frames_to_surfaces(vr):
+                self.movie.append(surface.convert() if convert else surface)
+            self.length = len(self.movie)
         end = datetime.datetime.now()
         print(end - start)
-        self.audio = Audio(filepath, as_sound=audio_as_sound)
-        self.length = len(self.movie)
-        cursor_loop_thread = Thread(target=cursor_loop, args=(self.framerate, self.length, self.audio.audio))
-        cursor_loop_thread.start()
-        self.unmodified_movie = copy(self.movie)
+        self.audio = Audio(filepath, as_sound=audio_as_sound, cache=audio_cache)
+        self.channel = None  # channel of the playing cached Sound, streamed and music audio manage their own
+        self.clock = MovieClock(self.framerate, self.length)
+        self.unmodified_movie = self.movie  # frames are never modified in place, transforms happen at blit time
         print("Movie len: %d" % self.length)
 
+    def source_frame(self, index):
+        """
+        returns the untransformed surface for a frame, or None while a streamed frame is not decoded yet
+        """
+        if self.cache is not None:
+            return self.cache.surface(index)
+        if self.stream is not None:
+            return self.stream.get(index, block=self.last_surface is None)
+        return self.movie[index]
+
+    def frame(self, index):
+        """
+        returns the transformed surface for a frame, memoized per transform with LRU eviction
+        """
+        if self.transform.is_identity():
+            surface = self.source_frame(index)
+        else:
+            key = (index, self.transform.key())
+            surface = self.transform_cache.get(key)
+            if surface is not None:
+                self.transform_cache.move_to_end(key)
+            else:
+                surface = self.source_frame(index)
+                if surface is not None:
+                    surface = self.transform.apply(surface)
+                    if self.convert:
+                        surface = surface.convert()  # paid once per cache entry instead of on every blit
+                    self.transform_cache[key] = surface
+                    while len(self.transform_cache) > self.transform_cache_size:
+                        self.transform_cache.popitem(last=False)
+        if surface is None:
+            #   Decoder is behind: keep showing the last frame rather than stalling the game loop
+            return self.last_surface
+        self.last_surface = surface
+        return surface
+
     def set_rotation(self, angle):
-        for x in range(len(self.movie)):
-            self.movie[x] = pygame.transform.rotate(self.unmodified_movie[x], angle - 90)
+        self.transform.angle = angle
 
     def set_scale(self, factor):
-        w, h = self.movie[0].get_size()
-        for x in range(len(self.movie)):
-            self.movie[x] = pygame.transform.scale(self.unmodified_movie[x], (w * factor, h * factor))
+        self.transform.scale = factor
 
     def set_flip(self, bool_x=0, bool_y=0):
-        for x in range(len(self.movie)):
-            self.movie[x] = pygame.transform.flip(self.unmodified_movie[x], bool_x, bool_y)
+        self.transform.flip_x = bool_x
+        self.transform.flip_y = bool_y
+
+    def set_crop(self, rect=None):
+        self.transform.crop = rect
+
+    def _start_audio(self):
+        if self.audio.stream is not None:
+            #   Streamed audio starts where the movie is, e.g. after a seek while stopped
+            self.audio.stream.set_pos(int(self.clock.elapsed_frames()) % self.clock.length / self.framerate)
+            self.audio.stream.play()
+        elif isinstance(self.audio.audio, str):
+            #   pygame.mixer.music is global, only one music mode movie can play at a time
+            pygame.mixer.music.play()
+        else:
+            self.channel = self.audio.audio.play()
 
     def play(self):
-        global cursor_inc
-        cursor_inc = 1
+        if self.clock.playing:
+            return
+        if self.audio.stream is not None and self.audio.stream.is_playing:
+            self.audio.stream.unpause()
+        elif isinstance(self.audio.audio, str) and pygame.mixer.music.get_pos() != -1:
+            pygame.mixer.music.unpause()
+        elif self.channel is not None and self.channel.get_sound() is self.audio.audio:
+            self.channel.unpause()
+        else:
+            self._start_audio()
+        self.clock.start()
 
     def stop(self):
-        global cursor_inc
-        cursor_inc = 0
+        if not self.clock.playing:
+            return
+        if self.audio.stream is not None:
+            self.audio.stream.pause()
+        elif isinstance(self.audio.audio, str):
+            pygame.mixer.music.pause()
+        elif self.channel is not None:
+            self.channel.pause()
+        self.clock.pause()
+
+    def cursor(self):
+        """
+        returns the frame to show now, restarting the audio whenever the movie loops
+        """
+        cursor, wrapped = self.clock.tick()
+        if wrapped and self.clock.playing:
+            if self.audio.stream is not None:
+                self.audio.stream.set_pos(cursor / self.framerate)  # next pass, no process per chunk
+            elif isinstance(self.audio.audio, str):
+                pygame.mixer.music.rewind()
+            else:
+                if self.channel is not None:
+                    self.channel.stop()
+                self._start_audio()
+        return cursor
 
     def blit(self, surface, pos):
-        global cursor
+        surface.blit(self.frame(self.cursor()), pos)
 
-        surface.blit(self.movie[cursor], pos)
-        # print(self.length,cursor)
+    def thumbnails(self, count=32, size=(160, 90)):
+        """
+        returns a cached ThumbnailAtlas of evenly spaced frames, scrubbing previews need no decoded movie
+        """
+        return thumbnails.load(self.filepath, destination_path(os.path.basename(self.filepath)), count, size)
 
     def blit_frame(self, surface, pos, frame=0):
         if not frame <= self.length:
             frame = 0
             warnings.warn("At 'blit_frame' call: requested frame number greater than movie length.")
 
-        surface.blit(self.movie[frame], pos)
+        surface.blit(self.frame(frame), pos)
 
 
 def test():
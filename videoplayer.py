@@ -1,10 +1,23 @@
+import importlib.util
 import os
 import subprocess
+import sys
 import wave
+import weakref
 import pygame
 
 pygame.mixer.pre_init(frequency=44100, size=-16, channels=1)
 
+VIDEOPLAYER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "VideoPlayer")
+if VIDEOPLAYER_DIR not in sys.path:
+    sys.path.append(VIDEOPLAYER_DIR)  # flat imports of the streaming player
+import decodeconfig
+
+# loaded by path, this file shadows the name of the streaming player
+_spec = importlib.util.spec_from_file_location("streaming_videoplayer", os.path.join(VIDEOPLAYER_DIR, "videoplayer.py"))
+streaming = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(streaming)
+
 
 class AudioAdapter(object):
     def __init__(self, filename, path=""):
@@ -14,29 +27,27 @@ class AudioAdapter(object):
         self._audio_file = wave.open(os.path.join(self._path, self._filename.split(".")[0] + ".wav"), "r")  # open wave
         self._audio_frames = self._audio_file.getnframes()  # get n frames
         self._audio_frame_rate = self._audio_file.getframerate()  # get fps
+        self._audio_channels = self._audio_file.getnchannels()  # get channels
+        self._audio_sample_width = self._audio_file.getsampwidth()  # get sample width
         self._audio_array = self._audio_file.readframes(self._audio_frames)  # read frames to array
-        self._audio_sound_array = pygame.sndarray.array(self._audio_array)  # create sound array
-        self._audio_sound = pygame.mixer.Sound(self._audio_sound_array)  # load sound
-
-        self._audio_is_playing = False
+        self._audio_stream = streaming.StreamingAudioAdapter(streaming.MemoryReader(
+            self._audio_array, self._audio_frame_rate, self._audio_channels, self._audio_sample_width
+        ))  # chunked playback, a seek only moves the reader
 
     def set_pos(self, index):
         """
-        set position of sound
+        set position of sound, sample accurate and without copying the buffer
         :param index: num in seconds
         :return: None
         """
-        self._audio_sound = pygame.mixer.Sound(
-            pygame.sndarray.array(self._audio_array[index * self._audio_frame_rate:])
-        )
+        self._audio_stream.set_pos(index)
 
     def play(self):
         """
         start playback
         :return: None
         """
-        self._audio_sound.play()
-        self._audio_is_playing = True
+        self._audio_stream.play()
 
     def stop(self):
         """
@@ -44,8 +55,7 @@ class AudioAdapter(object):
         stop audio playback
         :return: None
         """
-        self._audio_sound.stop()
-        self._audio_is_playing = False
+        self._audio_stream.stop()
 
     @property
     def is_playing(self):
@@ -53,13 +63,13 @@ class AudioAdapter(object):
         returns bool
         :return: bool
         """
-        return self._audio_is_playing
+        return self._audio_stream.is_playing
 
 
 class VideoPlayer(object):
     FFMPEG_BINARY = "binaries/ffmpeg.exe"
     FFPROBE_BINARY = "binaries/ffprobe.exe"
-    THREAD_NUM = 4
+    THREAD_NUM = None  # None shares the cores between the open players, an int forces the -threads value
 
     def __init__(self, filename, path="", position=(0, 0), resolution=None):
         if not os.path.isfile(os.path.join(path, filename)):
@@ -90,6 +100,8 @@ class VideoPlayer(object):
         self._rect = self._image.get_rect(topleft=position)  # get boundary
 
         # frame pipe
+        decodeconfig.register_player()  # counts towards the thread split of every player
+        self._unregister = weakref.finalize(self, decodeconfig.unregister_player)  # once the player is collected
         self._pipe = self._open_frame_pipe(0)  # open pipe at the beginning of the video
 
         # time management
@@ -102,6 +114,9 @@ class VideoPlayer(object):
         self._last_video_cursor = 0  # last video cursor
         self._frame_buffer_size = self._resolution[0] * self._resolution[1] * 3  # set frame buffer size for rgb24
         self._image_format = "RGB"
+        self._frame_buffer = bytearray(self._frame_buffer_size)  # reused frame buffer
+        self._frame_image = pygame.image.frombuffer(self._frame_buffer, self._resolution, self._image_format)
+        self._scaled_image = pygame.Surface(self._resize_resolution, 0, self._frame_image)  # reused scale target
         self._video_is_playing = False
 
         # audio management
@@ -135,8 +150,8 @@ class VideoPlayer(object):
             self._video_cursor += self._delta_time * self._fps  # increase video cursor
             if int(self._video_cursor) != self._last_video_cursor:
                 if self._last_video_cursor < self._total_frames:
-                    raw_image_buffer = self._pipe.stdout.read(self._frame_buffer_size)
-                    self._image = pygame.image.frombuffer(raw_image_buffer, self._resolution, self._image_format)
+                    self._pipe.stdout.readinto(self._frame_buffer)  # read into the shared buffer
+                    self._image = self._frame_image
                     self._scale()
                     self._last_video_cursor = int(self._video_cursor)
 
@@ -151,7 +166,7 @@ class VideoPlayer(object):
         surface.blit(self._image, self._rect)
 
     def _scale(self):
-        self._image = pygame.transform.scale(self._image, self._resize_resolution)
+        self._image = pygame.transform.scale(self._image, self._resize_resolution, self._scaled_image)
 
     def _open_frame_pipe(self, index):
         """
@@ -159,11 +174,12 @@ class VideoPlayer(object):
         :param index: start index
         :return: PIP obj
         """
+        threads = self.THREAD_NUM if self.THREAD_NUM is not None else decodeconfig.decode_threads()
         command = [self.FFMPEG_BINARY,
                    '-loglevel', 'fatal',
                    '-ss', str(index / self._fps),
                    '-i', os.path.join(self._path, self._filename),
-                   '-threads', str(self.THREAD_NUM),
+                   '-threads', str(threads),
                    '-vf', 'scale=%d:%d' % (self._resolution[0], self._resolution[1]),
                    '-vframes', str(self._total_frames),
                    '-f', 'image2pipe',